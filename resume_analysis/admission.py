@@ -0,0 +1,137 @@
+import hashlib
+import math
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+
+from resume_analysis import settings
+from resume_analysis.metrics import ADMISSION_REQUESTS
+from resume_analysis.progress import get_async_redis
+from resume_analysis.tasks import PREMIUM_PRIORITY, STANDARD_PRIORITY, queue_keys
+
+# Admission control for the submission endpoints. A request is refused (429 with
+# Retry-After) when the pipeline queues are backed up or when its client is out of
+# tokens; state lives in Redis so every API process enforces the same limits.
+# Premium tenants are exempt from the queue depth limit and get queue priority.
+
+PIPELINE_QUEUES = (settings.EXTRACT_QUEUE, settings.LLM_QUEUE, settings.RENDER_QUEUE)
+STATS_KEY = "admission-stats"
+
+# Token bucket refilled at ARGV[2] tokens per second up to ARGV[1], using the Redis
+# clock so API processes on different hosts agree. Returns {allowed, tokens left}.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'timestamp')
+local tokens = tonumber(bucket[1]) or capacity
+local timestamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - timestamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'timestamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class Admission(NamedTuple):
+    admitted: bool
+    priority: int
+    retry_after: int = 0
+    reason: str = ""
+
+
+def client_identity(request: Request) -> Tuple[str, bool]:
+    # (client id, premium) of a request
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return f"key:{api_key}", api_key in settings.PREMIUM_API_KEYS
+    return f"addr:{request.client.host if request.client else 'unknown'}", False
+
+
+async def queue_depths() -> Dict[str, int]:
+    # Messages waiting in each pipeline queue, over all of its priority lists
+    client = get_async_redis()
+    pipe = client.pipeline()
+    for queue in PIPELINE_QUEUES:
+        for key in queue_keys(queue):
+            pipe.llen(key)
+    lengths = iter(await pipe.execute())
+    return {queue: sum(next(lengths) for _ in queue_keys(queue)) for queue in PIPELINE_QUEUES}
+
+
+async def take_token(client_id: str) -> int:
+    # Seconds until the client may submit again, 0 when a token was taken
+    if settings.RATE_LIMIT_PER_MINUTE <= 0:
+        return 0
+    rate = settings.RATE_LIMIT_PER_MINUTE / 60
+    # Hashed, so API keys aren't stored in Redis
+    key = "rate-limit:" + hashlib.sha256(client_id.encode("utf-8")).hexdigest()[:32]
+    allowed, tokens = await get_async_redis().eval(_TOKEN_BUCKET_SCRIPT, 1, key,
+                                                   max(1, settings.RATE_LIMIT_BURST), rate)
+    if allowed:
+        return 0
+    return max(1, math.ceil((1 - float(tokens)) / rate))
+
+
+async def _count(outcome: str) -> None:
+    # Per process for Prometheus, and shared by all API processes for /admission/stats
+    ADMISSION_REQUESTS.labels(outcome).inc()
+    try:
+        await get_async_redis().hincrby(STATS_KEY, outcome, 1)
+    except Exception as e:
+        print(f"Warning: could not record admission outcome: {str(e)}")
+
+
+async def admit(request: Request) -> Admission:
+    # Decide whether a submission may queue work. When Redis can't be reached the
+    # request is let through, the broker call will surface the outage anyway.
+    client_id, premium = client_identity(request)
+    priority = PREMIUM_PRIORITY if premium else STANDARD_PRIORITY
+    try:
+        # Queue depth first, so a request refused for load doesn't use up a token
+        if not premium and settings.ADMISSION_MAX_QUEUE_DEPTH > 0:
+            depth = sum((await queue_depths()).values())
+            if depth >= settings.ADMISSION_MAX_QUEUE_DEPTH:
+                await _count("rejected_queue_depth")
+                return Admission(False, priority, settings.ADMISSION_RETRY_AFTER, "Server busy, too many queued tasks")
+        retry_after = await take_token(client_id)
+        if retry_after:
+            await _count("rejected_rate_limit")
+            return Admission(False, priority, retry_after, "Rate limit exceeded")
+    except Exception as e:
+        print(f"Warning: admission check failed, admitting request: {str(e)}")
+        ADMISSION_REQUESTS.labels("admitted_unchecked").inc()
+        return Admission(True, priority)
+    await _count("admitted_premium" if premium else "admitted")
+    return Admission(True, priority)
+
+
+def task_priority(request: Request) -> Optional[int]:
+    # Priority chosen for the request by admission control, None for the default
+    admission = getattr(request.state, "admission", None)
+    return admission.priority if admission is not None else None
+
+
+def request_client(request: Request) -> str:
+    # Client id of the request, what its submissions are coalesced under
+    return client_identity(request)[0]
+
+
+async def admission_stats() -> Dict:
+    counters = {key.decode(): int(value) for key, value in (await get_async_redis().hgetall(STATS_KEY)).items()}
+    depths = await queue_depths()
+    return {
+        "queue_depth": depths,
+        "total_queue_depth": sum(depths.values()),
+        "max_queue_depth": settings.ADMISSION_MAX_QUEUE_DEPTH,
+        "admitted": counters.get("admitted", 0),
+        "admitted_premium": counters.get("admitted_premium", 0),
+        "rejected_queue_depth": counters.get("rejected_queue_depth", 0),
+        "rejected_rate_limit": counters.get("rejected_rate_limit", 0),
+    }
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urljoin, urlparse
+from urllib.request import Request, urlopen
+
+from resume_analysis import settings
+from resume_analysis.metrics import CACHE_REQUESTS
+
+MANIFEST_NAME = "manifest.json"
+_CSS_URL_RE = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)")
+
+
+class AssetFetcher:
+    # WeasyPrint url_fetcher backed by a local asset cache. Remote URLs (the Google
+    # Fonts stylesheet and its font files) are served from files listed in
+    # <asset_dir>/manifest.json, so renders never wait on a CDN. A URL missing from
+    # the cache is counted as a miss and, with cache_missing, downloaded into the
+    # cache once (with the files its stylesheet references) and served from there on.
+    # Other misses are denied unless external fetches are allowed.
+
+    def __init__(self, asset_dir: str = settings.ASSET_DIR, allow_external: bool = settings.ASSET_ALLOW_EXTERNAL,
+                 cache_missing: bool = settings.ASSET_CACHE_MISSING):
+        self.asset_dir = asset_dir
+        self.allow_external = allow_external
+        self.cache_missing = cache_missing
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._assets: Dict[str, Dict[str, Any]] = {}
+        # URLs whose download failed in this process, not retried on every render
+        self._failed = set()
+
+        manifest_path = os.path.join(asset_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self._load(json.load(f))
+
+    def _load(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        # Keep assets in memory, they are small and used by every render
+        for url, entry in manifest.items():
+            if url in self._assets:
+                continue
+            with open(os.path.join(self.asset_dir, entry["file"]), "rb") as asset:
+                self._assets[url] = {
+                    "string": asset.read(),
+                    "mime_type": entry.get("mime_type"),
+                    "encoding": entry.get("encoding"),
+                    "redirected_url": url
+                }
+
+    def _cache(self, url: str) -> Optional[Dict[str, Any]]:
+        # Download a missing asset into the cache, once per process
+        with self._lock:
+            if url in self._failed:
+                return None
+            try:
+                self._load(populate([url], self.asset_dir))
+            except Exception as e:
+                self._failed.add(url)
+                print(f"Warning: could not cache external asset {url}: {str(e)}")
+                return None
+            return self._assets.get(url)
+
+    def __call__(self, url: str, timeout: int = 10, ssl_context=None) -> Dict[str, Any]:
+        from weasyprint import default_url_fetcher
+
+        scheme = urlparse(url).scheme
+        if scheme not in ("http", "https"):
+            # file: and data: URLs are local already
+            return default_url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+
+        asset = self._assets.get(url)
+        with self._lock:
+            if asset is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        CACHE_REQUESTS.labels("assets", "hit" if asset is not None else "miss").inc()
+        if asset is not None:
+            return dict(asset)
+
+        if self.cache_missing:
+            asset = self._cache(url)
+            if asset is not None:
+                return dict(asset)
+
+        if not self.allow_external:
+            print(f"Warning: external asset not in local cache, fetch denied: {url}")
+            raise ValueError(f"External fetch denied for {url}")
+        print(f"Warning: external asset not in local cache, fetching: {url}")
+        return default_url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"assets": len(self._assets), "hits": self.hits, "misses": self.misses}
+
+
+_fetcher: Optional[AssetFetcher] = None
+
+
+def get_asset_fetcher() -> AssetFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = AssetFetcher()
+    return _fetcher
+
+
+def populate(urls, asset_dir: str = settings.ASSET_DIR) -> Dict[str, Dict[str, Any]]:
+    # Download assets (and the font files referenced by stylesheets) into the local cache
+    os.makedirs(asset_dir, exist_ok=True)
+    manifest_path = os.path.join(asset_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    pending = list(urls)
+    while pending:
+        url = pending.pop(0)
+        if url in manifest:
+            continue
+        # The default user agent makes Google Fonts serve TrueType files
+        with urlopen(Request(url, headers={"User-Agent": "WeasyPrint"}), timeout=30) as response:
+            content = response.read()
+            content_type = response.headers.get_content_type()
+            encoding = response.headers.get_content_charset()
+
+        extension = mimetypes.guess_extension(content_type) or os.path.splitext(urlparse(url).path)[1] or ".bin"
+        filename = f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}{extension}"
+        with open(os.path.join(asset_dir, filename), "wb") as f:
+            f.write(content)
+        manifest[url] = {"file": filename, "mime_type": content_type, "encoding": encoding}
+        print(f"Cached {url} as {filename}")
+
+        if content_type == "text/css":
+            css = content.decode(encoding or "utf-8")
+            pending.extend(urljoin(url, ref) for ref in _CSS_URL_RE.findall(css) if not ref.startswith("data:"))
+
+    # Replaced atomically, render processes may read it while another one writes it
+    partial_path = f"{manifest_path}.{os.getpid()}.part"
+    with open(partial_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial_path, manifest_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    # python -m resume_analysis.assets <url> [<url> ...]
+    if len(sys.argv) < 2:
+        print("Usage: python -m resume_analysis.assets <url> [<url> ...]")
+        sys.exit(1)
+    populate(sys.argv[1:])
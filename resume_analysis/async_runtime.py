@@ -0,0 +1,68 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Awaitable, Optional
+
+from resume_analysis import settings
+
+# One long-lived event loop per process, running in a background thread. Worker
+# threads (Celery "threads" pool) submit coroutines to it and block on the result,
+# so a single process keeps many LLM requests in flight over one connection pool.
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    # Runs until shutdown() stops the loop, then releases its selector
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    # Start the background loop on first use (and again after a fork)
+    global _loop, _loop_pid
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid() or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_run_loop, args=(loop,), name="analyzer-event-loop", daemon=True)
+            thread.start()
+            _loop = loop
+            _loop_pid = os.getpid()
+        return _loop
+
+
+def current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    # The shared loop of this process if it is running, without starting one
+    with _lock:
+        if _loop is not None and _loop_pid == os.getpid() and _loop.is_running():
+            return _loop
+    return None
+
+
+def run_coroutine(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    # Run a coroutine on the shared loop from synchronous code and wait for its result
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    return future.result(timeout)
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    # Cap on concurrent in-flight LLM requests for the running event loop
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def shutdown() -> None:
+    global _loop
+    with _lock:
+        loop, _loop = _loop, None
+    if loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from resume_analysis import settings
+from resume_analysis.metrics import CACHE_REQUESTS
+
+# Bump to invalidate every cached entry (e.g. after changing prompts or schemas)
+CACHE_VERSION = "1"
+
+
+class MemoryCacheBackend:
+    # In-process LRU cache with per-entry TTL
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteCacheBackend:
+    # Local on-disk cache shared by all processes on the host, LRU-evicted by last access
+
+    def __init__(self, path: str, namespace: str = "llm", max_entries: int = 10000):
+        self.path = path
+        self.table = f"cache_{re.sub(r'[^0-9a-zA-Z_]', '_', namespace)}"
+        self.max_entries = max_entries
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_accessed_at ON {self.table} (accessed_at)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl, now)
+        )
+        # Drop expired rows, then the least recently used ones above the size bound
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def delete(self, key: str) -> None:
+        conn = self._connect()
+        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        conn.commit()
+
+
+class RedisCacheBackend:
+    # Cache shared by every API/worker process through the Celery Redis.
+    # Entries expire through Redis TTLs; a sorted set of last-access times bounds the size.
+
+    def __init__(self, url: str, namespace: str = "llm", max_entries: int = 10000):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = f"cache:{namespace}:"
+        self.index_key = f"cache:{namespace}:__index__"
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        self.client.zadd(self.index_key, {key: time.time()})
+        return value.decode("utf-8")
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=ttl)
+        pipe.zadd(self.index_key, {key: time.time()})
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+        if size > self.max_entries:
+            evicted = self.client.zpopmin(self.index_key, size - self.max_entries)
+            if evicted:
+                self.client.delete(*[self.prefix + k.decode("utf-8") for k, _ in evicted])
+
+    def delete(self, key: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self.prefix + key)
+        pipe.zrem(self.index_key, key)
+        pipe.execute()
+
+
+def normalize_input(value: Any) -> Any:
+    # Collapse whitespace so re-extracted or re-pasted text maps to the same key
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: normalize_input(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_input(v) for v in value]
+    return value
+
+
+class ResponseCache:
+    # Content-addressed JSON cache in front of any backend, with hit/miss counters.
+    # name labels its lookups in the cache_requests metric.
+
+    def __init__(self, backend, ttl: int, name: str = "default"):
+        self.backend = backend
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        payload = json.dumps([CACHE_VERSION, *[normalize_input(p) for p in parts]], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A broken cache must never fail the request, treat it as a miss
+            self.errors += 1
+            self.misses += 1
+            CACHE_REQUESTS.labels(self.name, "error").inc()
+            print(f"Warning: cache lookup failed: {str(e)}")
+            return None
+        if value is None:
+            self.misses += 1
+            CACHE_REQUESTS.labels(self.name, "miss").inc()
+            return None
+        self.hits += 1
+        CACHE_REQUESTS.labels(self.name, "hit").inc()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self.backend.set(key, json.dumps(value, ensure_ascii=False), self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"Warning: cache store failed: {str(e)}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+def create_cache(backend: str, namespace: str, ttl: int, max_entries: int,
+                 sqlite_path: str = settings.LLM_CACHE_SQLITE_PATH) -> Optional[ResponseCache]:
+    # Build a ResponseCache for the configured backend name, or None when caching is disabled
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return ResponseCache(RedisCacheBackend(settings.REDIS_URL, namespace, max_entries), ttl, namespace)
+    if backend == "sqlite":
+        return ResponseCache(SQLiteCacheBackend(sqlite_path, namespace, max_entries), ttl, namespace)
+    if backend == "memory":
+        return ResponseCache(MemoryCacheBackend(max_entries), ttl, namespace)
+    raise ValueError(f"Unsupported cache backend: {backend}")
+
+
+_llm_cache: Optional[ResponseCache] = None
+_llm_cache_initialized = False
+
+
+def get_llm_cache() -> Optional[ResponseCache]:
+    # One LLM response cache per process, so counters cover every analyzer instance
+    global _llm_cache, _llm_cache_initialized
+    if not _llm_cache_initialized:
+        _llm_cache = create_cache(
+            settings.LLM_CACHE_BACKEND,
+            namespace="llm",
+            ttl=settings.LLM_CACHE_TTL,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES
+        )
+        _llm_cache_initialized = True
+    return _llm_cache
@@ -1,28 +1,96 @@
-from sqlalchemy import Column, String, Text, DateTime, select, create_engine
+from sqlalchemy import Column, String, DateTime, JSON, LargeBinary, Index, select, delete, create_engine, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.types import TypeDecorator
 import datetime
-import json
+import threading
+import zstandard
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from resume_analysis import settings
+from resume_analysis.metrics import DB_SECONDS
+from resume_analysis.serialization import dumps_str, loads
 
 # Define the Pydantic schema for input
 class SaveResumeAnalysis(BaseModel):
     task_id: str
-    resume_text: str 
+    resume_text: str
     job_description: str
     analysis_results: Optional[Dict] = None
 
 # Async DB (for FastAPI)
-ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./resume_analysis.db"
-async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=True)
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{settings.DATABASE_PATH}"
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=settings.DATABASE_ECHO,
+                                   json_serializer=dumps_str, json_deserializer=loads,
+                                   pool_size=settings.DATABASE_POOL_SIZE,
+                                   max_overflow=settings.DATABASE_MAX_OVERFLOW)
 AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
 
 # Sync DB (for Celery)
-SYNC_DATABASE_URL = "sqlite:///./resume_analysis.db"
-sync_engine = create_engine(SYNC_DATABASE_URL, connect_args={"check_same_thread": False})
+SYNC_DATABASE_URL = f"sqlite:///{settings.DATABASE_PATH}"
+sync_engine = create_engine(SYNC_DATABASE_URL, echo=settings.DATABASE_ECHO,
+                            json_serializer=dumps_str, json_deserializer=loads,
+                            pool_size=settings.DATABASE_POOL_SIZE,
+                            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+                            connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(bind=sync_engine)
 
+
+# Both engines write the same file: WAL lets the API read while a worker writes, and
+# the busy timeout makes concurrent writers wait for the lock instead of failing.
+# auto_vacuum only applies to a file whose header isn't written yet, so it goes first:
+# switching to WAL writes the header.
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.DATABASE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.DATABASE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={settings.DATABASE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# zstd contexts aren't safe to share between threads
+_zstd = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    if not hasattr(_zstd, "compressor"):
+        _zstd.compressor = zstandard.ZstdCompressor(level=settings.DATABASE_COMPRESSION_LEVEL)
+    return _zstd.compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    if not hasattr(_zstd, "decompressor"):
+        _zstd.decompressor = zstandard.ZstdDecompressor()
+    return _zstd.decompressor
+
+
+class CompressedText(TypeDecorator):
+    # Text stored as a zstd frame. Rows written before compression was introduced
+    # hold plain text and are returned as they are.
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return _compressor().compress(value.encode("utf-8"))
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        return _decompressor().decompress(value).decode("utf-8")
+
+
 # Declare Base
 Base = declarative_base()
 
@@ -31,20 +99,40 @@ class ResumeAnalysis(Base):
     __tablename__ = "resume_analyses"
 
     id = Column(String, primary_key=True, index=True)
-    resume_text = Column(Text, nullable=False)
-    job_description = Column(Text, nullable=False)
-    analysis_results = Column(Text, nullable=True)
+    resume_text = Column(CompressedText, nullable=False)
+    job_description = Column(CompressedText, nullable=False)
+    # Stored as JSON text, so rows written as json.dumps strings read back the same
+    analysis_results = Column(JSON(none_as_null=True), nullable=True)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
+    # Retention pruning scans by age
+    __table_args__ = (Index("ix_resume_analyses_timestamp", "timestamp"),)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
             "resume_text": self.resume_text,
             "job_description": self.job_description,
-            "analysis_results": json.loads(self.analysis_results) if self.analysis_results else None,
+            "analysis_results": self.analysis_results,
             "timestamp": self.timestamp.isoformat()
         }
 
+
+def init_db(engine: Engine = sync_engine) -> None:
+    # Create the table and its indexes if missing. New database files get incremental
+    # auto-vacuum from the connect hook, so pruning can hand freed pages back to the
+    # filesystem; files created without it are converted once, which needs a VACUUM.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+    Base.metadata.create_all(engine)
+    # Indexes added after a table was created aren't covered by create_all
+    for index in ResumeAnalysis.__table__.indexes:
+        index.create(engine, checkfirst=True)
+    # Forked worker processes must not inherit these connections
+    engine.dispose()
+
 # Async DB dependency for FastAPI
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -52,32 +140,32 @@ async def get_db():
 
 # Async save function (FastAPI)
 async def save_resume_analysis(data: SaveResumeAnalysis, db: AsyncSession) -> ResumeAnalysis:
-    analysis_json = json.dumps(data.analysis_results) if data.analysis_results else None
-    analysis = ResumeAnalysis(
-        id=data.task_id,
-        resume_text=data.resume_text,
-        job_description=data.job_description,
-        analysis_results=analysis_json
-    )
-    db.add(analysis)
-    await db.commit()
-    await db.refresh(analysis)
-    return analysis
+    with DB_SECONDS.labels("save").time():
+        analysis = ResumeAnalysis(
+            id=data.task_id,
+            resume_text=data.resume_text,
+            job_description=data.job_description,
+            analysis_results=data.analysis_results
+        )
+        db.add(analysis)
+        await db.commit()
+        await db.refresh(analysis)
+        return analysis
 
 # Sync save function (Celery)
 def save_resume_analysis_sync(ResumeData: SaveResumeAnalysis) -> ResumeAnalysis:
     db = SessionLocal()
     try:
-        analysis_json = json.dumps(ResumeData.analysis_results) if ResumeData.analysis_results else None
-        analysis = ResumeAnalysis(
-            id=ResumeData.task_id,
-            resume_text=ResumeData.resume_text,
-            job_description=ResumeData.job_description,
-            analysis_results=analysis_json
-        )
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+        with DB_SECONDS.labels("save").time():
+            analysis = ResumeAnalysis(
+                id=ResumeData.task_id,
+                resume_text=ResumeData.resume_text,
+                job_description=ResumeData.job_description,
+                analysis_results=ResumeData.analysis_results
+            )
+            db.add(analysis)
+            db.commit()
+            db.refresh(analysis)
         return analysis
     except Exception as e:
         db.rollback()
@@ -85,7 +173,49 @@ def save_resume_analysis_sync(ResumeData: SaveResumeAnalysis) -> ResumeAnalysis:
     finally:
         db.close()
 
+# Bulk save function (write-behind flusher): one transaction for the whole batch.
+# Rows already stored (a batch delivered twice) are skipped.
+def save_resume_analyses_bulk(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    with DB_SECONDS.labels("save_bulk").time(), SessionLocal() as db:
+        db.execute(sqlite_insert(ResumeAnalysis).on_conflict_do_nothing(index_elements=["id"]), rows)
+        db.commit()
+
 # Async get function (FastAPI)
 async def get_resume_analysis(task_id: str, db: AsyncSession) -> Optional[ResumeAnalysis]:
-    result = await db.execute(select(ResumeAnalysis).where(ResumeAnalysis.id == task_id))
-    return result.scalars().first()
+    with DB_SECONDS.labels("get").time():
+        if settings.ANALYSIS_PERSISTENCE_MODE == "write_behind":
+            # Analyses waiting for the flusher are only in Redis. They are removed from
+            # there after their batch commits, so checking Redis first never misses one.
+            from resume_analysis.write_behind import get_pending_analysis
+            pending = await get_pending_analysis(task_id)
+            if pending is not None:
+                return pending
+        result = await db.execute(select(ResumeAnalysis).where(ResumeAnalysis.id == task_id))
+        return result.scalars().first()
+
+# Retention (Celery beat)
+def prune_resume_analyses(retention_days: int = settings.ANALYSIS_RETENTION_DAYS,
+                          batch_size: int = settings.ANALYSIS_PRUNE_BATCH_SIZE) -> int:
+    # Delete analyses older than retention_days in short transactions, then release
+    # the freed pages and checkpoint the WAL. Returns the number of rows deleted.
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+    removed = 0
+    while True:
+        with SessionLocal() as db:
+            expired = select(ResumeAnalysis.id).where(ResumeAnalysis.timestamp < cutoff).limit(batch_size)
+            deleted = db.execute(delete(ResumeAnalysis).where(ResumeAnalysis.id.in_(expired))).rowcount
+            db.commit()
+        removed += deleted
+        if deleted < batch_size:
+            break
+
+    with sync_engine.connect() as conn:
+        if removed:
+            # Frees one page per step and its rows have no columns to fetch, so pysqlite's
+            # execute() would free a single page; executescript() steps to completion
+            conn.connection.driver_connection.executescript("PRAGMA incremental_vacuum")
+        conn.exec_driver_sql("PRAGMA optimize")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return removed
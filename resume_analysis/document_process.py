@@ -1,24 +1,34 @@
 import asyncio
 import os
-import fitz
+import time
 import docx
 import uuid
 # import pdfkit
-from weasyprint import HTML, CSS
-from fastapi.templating import Jinja2Templates
+from resume_analysis import settings
+from resume_analysis.cache import create_cache
+from resume_analysis.metrics import RENDER_SECONDS, TEXT_EXTRACTION_SECONDS, count_error
+from resume_analysis.pdf_extraction import extract_pdf_text
+from resume_analysis.render_pool import render_pdf_async
+from resume_analysis.upload_store import UploadStore
+
+def _extract_word_text_sync(docx_path):
+    started = time.perf_counter()
+    doc = docx.Document(docx_path)
+    text = "".join(f"{paragraph.text}\n" for paragraph in doc.paragraphs)
+    # Word documents have no page count before layout
+    file_format = os.path.splitext(docx_path)[1].lstrip(".").lower()
+    TEXT_EXTRACTION_SECONDS.labels(file_format, "unknown").observe(time.perf_counter() - started)
+    return text
+
 
 async def extract_text_from_pdf(pdf_path):
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
-    text = ""
     try:
-        doc = fitz.open(pdf_path)
-        
-        for page in doc:
-            text += page.get_text() + "\n"
-            
-        doc.close()
+        # Extraction is blocking, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(None, extract_pdf_text, pdf_path)
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {str(e)}")
         
@@ -28,26 +38,59 @@ async def extract_text_from_word(docx_path):
     if not os.path.exists(docx_path):
         raise FileNotFoundError(f"Word document not found: {docx_path}")
         
-    text = ""
     try:
-        doc = docx.Document(docx_path)
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(None, _extract_word_text_sync, docx_path)
     except Exception as e:
         raise Exception(f"Error extracting text from Word document: {str(e)}")
         
     return text
 
-async def generate_resume_from_json(resume_data): 
-    templates = Jinja2Templates(directory="templates")
-    
-    PDF_DIR = "generated_pdfs"
-    os.makedirs(PDF_DIR, exist_ok=True)
-    
-    # Generate a unique filename for the PDF
-    filename = f"resume_{uuid.uuid4().hex}.pdf"
-    pdf_path = os.path.join(PDF_DIR, filename)
-    
+_text_cache = None
+_text_cache_initialized = False
+
+
+def get_text_cache():
+    # Extracted text keyed by upload content hash, shared by all processes
+    global _text_cache, _text_cache_initialized
+    if not _text_cache_initialized:
+        _text_cache = create_cache(
+            settings.TEXT_CACHE_BACKEND,
+            namespace="text",
+            ttl=settings.TEXT_CACHE_TTL,
+            max_entries=settings.TEXT_CACHE_MAX_ENTRIES,
+            sqlite_path=settings.TEXT_CACHE_SQLITE_PATH
+        )
+        _text_cache_initialized = True
+    return _text_cache
+
+
+async def extract_text_from_file(file_path):
+    # Extract text based on the file extension, reusing earlier extractions of the same content
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension not in [".pdf", ".docx", ".doc"]:
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
+    cache = get_text_cache()
+    content_hash = UploadStore.content_hash(file_path)
+    key = None
+    if cache is not None and content_hash is not None:
+        key = cache.make_key("extract_text", content_hash, file_extension)
+        text = cache.get(key)
+        if text is not None:
+            return text
+
+    if file_extension == ".pdf":
+        text = await extract_text_from_pdf(file_path)
+    else:
+        text = await extract_text_from_word(file_path)
+
+    if key is not None:
+        cache.set(key, text)
+    return text
+
+def format_resume_data(resume_data):
+    # Map the structured LLM output onto the fields used by the resume template
     # First, ensure resume_data is a dictionary
     if not isinstance(resume_data, dict):
         raise TypeError("resume_data must be a dictionary")
@@ -63,9 +106,6 @@ async def generate_resume_from_json(resume_data):
                 return default
         return current
         
-    # Get personal information
-    personal_info = resume_data.get("Personal Information", {})
-    
     formatted_data = {
         "basicDetails": {
             "name": safe_get(resume_data, "Personal Information", "Name"),
@@ -110,40 +150,31 @@ async def generate_resume_from_json(resume_data):
         ]
     }
     
-    # Render template with formatted data
-    html_content = templates.get_template("resume/resume.html").render(
-        resume=formatted_data
-    )
+    return formatted_data
+
+async def generate_resume_from_json(resume_data): 
+    PDF_DIR = settings.PDF_DIR
+    os.makedirs(PDF_DIR, exist_ok=True)
+    
+    # Generate a unique filename for the PDF
+    filename = f"resume_{uuid.uuid4().hex}.pdf"
+    pdf_path = os.path.join(PDF_DIR, filename)
     
+    formatted_data = format_resume_data(resume_data)
     
     try:  
-        # Save the HTML content to a temporary file
-        temp_html_path = os.path.join(PDF_DIR, f"temp_{uuid.uuid4().hex}.html")
-        with open(temp_html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-            
-        print(f"Temporary HTML file created at {temp_html_path}")
-                  
-        # Generate the PDF
-        # pdfkit.from_file(temp_html_path, pdf_path, options=options)
-        HTML(filename=temp_html_path).write_pdf(
-        pdf_path,
-        stylesheets=[CSS(string='@page { size: A4; margin: 5mm; }')]
-        )
+        # Render in a warm render process (in memory, precompiled template and stylesheets)
+        pdf_bytes = await render_pdf_async(formatted_data, formatted=True)
         
-        # Verify PDF was created and has content
-        if os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 0:
-            print(f"PDF generated successfully at {pdf_path}")
-        else:
+        # Verify PDF has content before writing it
+        if not pdf_bytes:
             print(f"PDF generation failed or created empty file at {pdf_path}")
             return None
             
-        # Clean up the temporary HTML file
-        try:
-            os.remove(temp_html_path)
-            print(f"Temporary HTML file removed: {temp_html_path}")
-        except Exception as e:
-            print(f"Warning: Could not remove temporary HTML file: {str(e)}")
+        with RENDER_SECONDS.labels("write").time():
+            with open(pdf_path, "wb") as f:
+                f.write(pdf_bytes)
+        print(f"PDF generated successfully at {pdf_path}")
             
         # Return the PDF filename and path
         return {
@@ -153,5 +184,6 @@ async def generate_resume_from_json(resume_data):
         }
         
     except Exception as e:
+        count_error("render", e)
         print(f"Error generating PDF: {str(e)}")
         return None
@@ -0,0 +1,102 @@
+import hashlib
+import time
+import uuid
+from typing import Callable, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from resume_analysis import settings
+from resume_analysis.progress import get_async_redis, last_event
+
+# Single-flight task submission. The first request for a key claims it in Redis
+# (SET NX with a TTL) with the pipeline id it is about to start; identical requests
+# arriving while the claim is held get that pipeline id back instead of enqueuing the
+# same work again. The claim is held until the pipeline's terminal progress event:
+# a pipeline that failed releases it to the next retry, one that completed keeps it
+# for IDEMPOTENCY_TTL seconds more, while its result can still be fetched.
+
+# Delete the claim only if it still holds the given pipeline id
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_CLAIM_ATTEMPTS = 3
+
+
+def request_key(endpoint: str, client_id: str, idempotency_key: Optional[str], *parts: str) -> str:
+    # Coalescing key of a request: the client's Idempotency-Key when it sent one,
+    # otherwise a hash of what identifies the work (upload hash, job description, ...).
+    # Both are scoped to the client (admission.client_identity), so one client's
+    # requests are never coalesced onto, and never return, another client's pipeline.
+    digest = hashlib.sha256()
+    for part in (client_id, *(("client", idempotency_key) if idempotency_key else parts)):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f"idempotency:{endpoint}:{digest.hexdigest()}"
+
+
+async def _release(key: str, pipeline_id: str) -> None:
+    try:
+        await get_async_redis().eval(_RELEASE_SCRIPT, 1, key, pipeline_id)
+    except Exception as e:
+        print(f"Warning: could not release idempotency key {key}: {str(e)}")
+
+
+async def _finished(pipeline_id: str) -> bool:
+    # Whether a claimed pipeline no longer absorbs duplicates: it failed, or it
+    # completed more than IDEMPOTENCY_TTL seconds ago and its result has expired
+    event = await last_event(pipeline_id)
+    if event is None:
+        return False
+    if event["stage"] == "failed":
+        return True
+    return event["stage"] == "completed" and time.time() - event["timestamp"] > settings.IDEMPOTENCY_TTL
+
+
+async def _claim(key: str, ttl: int) -> Tuple[Optional[str], bool]:
+    # (pipeline_id, duplicate): a fresh id now held under key, the id of the request
+    # holding the claim, or (None, False) when the key couldn't be claimed
+    client = get_async_redis()
+    for _ in range(_CLAIM_ATTEMPTS):
+        pipeline_id = str(uuid.uuid4())
+        if await client.set(key, pipeline_id, nx=True, ex=ttl):
+            return pipeline_id, False
+        existing = await client.get(key)
+        if existing is None:
+            # The claim expired in between, try again
+            continue
+        existing = existing.decode()
+        if await _finished(existing):
+            await _release(key, existing)
+            continue
+        return existing, True
+    return None, False
+
+
+async def submit_once(key: str, submit: Callable[..., str],
+                      ttl: int = settings.IDEMPOTENCY_CLAIM_TTL) -> Tuple[str, bool]:
+    # Run submit(pipeline_id=...) unless a request with the same key holds a claim.
+    # Returns (pipeline_id, duplicate). When Redis is unreachable the request is
+    # submitted without coalescing rather than refused.
+    if not settings.IDEMPOTENCY_ENABLED:
+        return await run_in_threadpool(submit, pipeline_id=str(uuid.uuid4())), False
+
+    try:
+        pipeline_id, duplicate = await _claim(key, ttl)
+    except Exception as e:
+        print(f"Warning: idempotency check failed, submitting without coalescing: {str(e)}")
+        pipeline_id, duplicate = None, False
+    if duplicate:
+        return pipeline_id, True
+    if pipeline_id is None:
+        return await run_in_threadpool(submit, pipeline_id=str(uuid.uuid4())), False
+
+    try:
+        await run_in_threadpool(submit, pipeline_id=pipeline_id)
+    except BaseException:
+        # Nothing was queued, don't hand this id to duplicates
+        await _release(key, pipeline_id)
+        raise
+    return pipeline_id, False
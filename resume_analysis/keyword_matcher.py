@@ -0,0 +1,155 @@
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from resume_analysis import settings
+from resume_analysis.skills_taxonomy import SKILLS_TAXONOMY
+
+# Tokens keep the characters that are part of technology names (c++, c#, node.js, .net)
+_TOKEN_RE = re.compile(r"(?<![a-z0-9])\.?[a-z0-9][a-z0-9+#.]*")
+
+
+def fold_plural(token: str) -> str:
+    # Fold plural forms to singular so "databases"/"database" and "apis"/"api" match.
+    # Folding is applied to both the text and the taxonomy, so it only needs to be consistent.
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    # Lowercase, split on everything that can't be part of a technology name and fold plurals
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if token:
+            tokens.append(fold_plural(token))
+    return tokens
+
+
+class KeywordAutomaton:
+    # Aho-Corasick automaton over token sequences, so every taxonomy entry
+    # (including multi-word aliases) is found in a single pass over the text.
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per node: (keyword index, pattern length in tokens)
+        self._output: List[List[Tuple[int, int]]] = [[]]
+
+        for keyword, aliases in taxonomy.items():
+            keyword_id = len(self.keywords)
+            self.keywords.append(keyword)
+            for pattern in {keyword, *aliases}:
+                tokens = tokenize(pattern)
+                if tokens:
+                    self._add_pattern(tokens, keyword_id)
+        self._build_fail_links()
+
+    def _add_pattern(self, tokens: List[str], keyword_id: int) -> None:
+        node = 0
+        for token in tokens:
+            next_node = self._goto[node].get(token)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][token] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((keyword_id, len(tokens)))
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                if node == 0:
+                    self._fail[child] = 0
+                else:
+                    fail = self._fail[node]
+                    while fail and token not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, tokens: List[str]) -> Set[str]:
+        # Return the keywords present in the token list, preferring the longest match
+        # where patterns overlap ("oracle ebs" is not also "oracle").
+        matches = []
+        node = 0
+        for position, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for keyword_id, length in self._output[node]:
+                matches.append((position - length + 1, position, keyword_id))
+
+        found = set()
+        covered_until = -1
+        for start, end, keyword_id in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+            if start > covered_until:
+                found.add(self.keywords[keyword_id])
+                covered_until = end
+        return found
+
+    def find_in_text(self, text: str) -> Set[str]:
+        return self.find(tokenize(text))
+
+
+class KeywordMatcher:
+    # Local, deterministic version of the get_missing_keywords scoring
+
+    def __init__(self, taxonomy: Optional[Dict[str, List[str]]] = None,
+                 high_match_score: int = settings.KEYWORD_MATCH_HIGH_SCORE,
+                 accept_score: int = settings.KEYWORD_MATCH_ACCEPT_SCORE,
+                 min_keywords: int = settings.KEYWORD_MATCH_MIN_KEYWORDS):
+        self.automaton = KeywordAutomaton(taxonomy if taxonomy is not None else SKILLS_TAXONOMY)
+        self.high_match_score = high_match_score
+        self.accept_score = accept_score
+        self.min_keywords = min_keywords
+
+    def analyze(self, resume_text: str, job_description: str) -> Dict[str, Any]:
+        # Same output format as ResumeAnalyzer.get_missing_keywords
+        job_keywords = self.automaton.find_in_text(job_description)
+        return self.score(self.automaton.find_in_text(resume_text), job_keywords)
+
+    def score(self, resume_keywords: Iterable[str], job_keywords: Iterable[str]) -> Dict[str, Any]:
+        job_keywords = set(job_keywords)
+        matched = job_keywords.intersection(resume_keywords)
+        missing = sorted(job_keywords - matched)
+
+        current_score = round(100 * len(matched) / len(job_keywords)) if job_keywords else 0
+        if current_score >= self.high_match_score or not missing:
+            # High Match Exception, same rule as the LLM prompt
+            return {"current_score": current_score, "expected_score": current_score, "missing_keywords": []}
+        return {"current_score": current_score, "expected_score": 100, "missing_keywords": missing}
+
+    def prescreen(self, resume_text: str, job_description: str) -> Tuple[bool, Dict[str, Any]]:
+        # Return (decided, result). decided is True when the resume clearly clears the
+        # high match threshold and the job description has enough recognised keywords
+        # for the local score to be trusted; otherwise result holds the candidate
+        # missing keywords to hand to the LLM.
+        job_keywords = self.automaton.find_in_text(job_description)
+        result = self.score(self.automaton.find_in_text(resume_text), job_keywords)
+        decided = len(job_keywords) >= self.min_keywords and result["current_score"] >= self.accept_score
+        return decided, result
+
+
+_matcher: Optional[KeywordMatcher] = None
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    # The automaton is compiled once per process
+    global _matcher
+    if _matcher is None:
+        _matcher = KeywordMatcher()
+    return _matcher
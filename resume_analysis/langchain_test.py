@@ -1,43 +1,139 @@
+import asyncio
 import getpass
 import os
 import json
-from typing import Dict, Any
-from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
+from contextlib import nullcontext
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from resume_analysis.async_runtime import llm_semaphore, run_coroutine
+from resume_analysis.cache import get_llm_cache
+from resume_analysis.llm_clients import get_chat_model
+from resume_analysis.llm_scheduler import LLMScheduler, get_scheduler
+from resume_analysis.metrics import LLM_TOKENS
+from resume_analysis.prompt_budget import compact_job_description, compact_resume, count_tokens
+from resume_analysis.settings import (LLM_MODEL_NAME, LLM_MODEL_PROVIDER, RESUME_GENERATION_MODE, LLM_SCHEDULER_ENABLED,
+                                      LLM_OUTPUT_TOKENS_ESTIMATE)
+
+
+class LLMRequest(NamedTuple):
+    # Everything needed to run (or look up in the cache) one analyzer prompt
+    method: str
+    llm_factory: Callable[[], Any]
+    system_message: str
+    message: str
+    inputs: tuple
+
+
+# Schemas and system prompts are static module constants: they are built once, and
+# every prompt starts with the same bytes (schema, then system prompt) so the
+# provider's prompt cache can reuse the prefix. Per-request data (resume, job
+# description, keywords) only appears at the end, in the human message.
+
+PERSONAL_INFORMATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "Name": {"type": "string"},
+        "Phone number": {"type": "string"},
+        "Email": {"type": "string"},
+        "LinkedIn": {"type": "string"},
+        "GitHub/portfolio": {"type": "string"}
+    },
+    "required": ["Name", "Phone number", "Email", "LinkedIn", "GitHub/portfolio"]
+}
+
+WORK_EXPERIENCE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "Company": {"type": "string"},
+            "Title": {"type": "string"},
+            "location": {"type": "string"},
+            "start_date": {"type": "string"},
+            "end_date": {"type": "string"},
+            "Descriptions": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["Company", "Title", "location", "start_date", "end_date", "Descriptions"]
+    }
+}
 
+EDUCATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "Institution": {"type": "string"},
+            "location": {"type": "string"},
+            "Degree": {"type": "string"},
+            "start_date": {"type": "string"},
+            "end_date": {"type": "string"}
+        },
+        "required": ["Institution", "Degree", "location", "start_date", "end_date"]
+    }
+}
 
-class ResumeAnalyzer:
-    # Class for analyzing resumes against job descriptions
-
-    def __init__(self, model_name: str = "gpt-4o-mini", model_provider: str = "openai"):
-        
-        # Load environment variables
-        load_dotenv()
+PROJECTS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "Title": {"type": "string"},
+            "Description": {"type": "array", "items": {"type": "string"}},
+            "Technologies": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["Title", "Description", "Technologies"]
+    }
+}
+
+OTHER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "Strengths": {"type": "array", "items": {"type": "string"}},
+        "Languages": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["Strengths", "Languages"]
+}
+
+CERTIFICATION_NAMES_SCHEMA = {"type": "array", "items": {"type": "string"}}
+CERTIFICATION_OBJECTS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "Title": {"type": "string"},
+            "Description": {"type": "string"}
+        },
+        "required": ["Title", "Description"]
+    }
+}
 
-        # Set OpenAI API key if not already set
-        if not os.environ.get("OPENAI_API_KEY"):
-            os.environ["OPENAI_API_KEY"] = getpass.getpass("Enter your OpenAI API key: ")
 
-        self.model_name = model_name
-        self.model_provider = model_provider
+def resume_data_schema(certifications_schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": "ResumeData",
+        "description": "Structured resume data with enhancements",
+        "type": "object",
+        "properties": {
+            "Most_Match_ROLE": {"type": "string"},
+            "Personal Information": PERSONAL_INFORMATION_SCHEMA,
+            "Professional Summary": {"type": "string"},
+            "Skills": {"type": "array", "items": {"type": "string"}},
+            "Work Experience": WORK_EXPERIENCE_SCHEMA,
+            "Education": EDUCATION_SCHEMA,
+            "Certifications": certifications_schema,
+            "Projects": PROJECTS_SCHEMA,
+            "Other": OTHER_SCHEMA
+        },
+        "required": ["Most_Match_ROLE", "Personal Information", "Professional Summary", "Skills", "Work Experience", "Education", "Certifications", "Projects", "Other"]
+    }
 
-    def _base_prompt(self, resume_data: str, job_description: str) -> str:
-        # Helper function to prepare the prompt
-        return f"""
-        Resume Data = "{resume_data}" and Job Description = "{job_description}"
-        """
-    
-    def get_missing_keywords(self, resume_data: str, job_description: str) -> Dict[str, Any]:
-        #Function used to extract missing keyword, current_score and expected_score.
-        # Initialize the chat model
-        llm = init_chat_model(self.model_name, model_provider=self.model_provider).with_structured_output(method="json_mode")
 
-        message = self._base_prompt(resume_data, job_description)
+RESUME_DATA_SCHEMA = resume_data_schema(CERTIFICATION_NAMES_SCHEMA)
+RESUME_FROM_KEYWORDS_SCHEMA = resume_data_schema(CERTIFICATION_OBJECTS_SCHEMA)
 
-        # System message defining the analysis task
-        system_message = """You are the backend engine for a resume analysis application. Given a job description and a candidate's resume, perform a technical keyword-based match analysis.
+MISSING_KEYWORDS_SYSTEM_PROMPT = """You are the backend engine for a resume analysis application. Given a job description and a candidate's resume, perform a technical keyword-based match analysis.
 
         Focus strictly on hard skills, tools, technologies, certifications, and domain-specific terms. Ignore soft skills, verbs, general responsibilities, or action words.
 
@@ -77,100 +173,7 @@ class ResumeAnalyzer:
         Do not return any explanations, comments, or extra text.
         Only return the structured JSON above."""
 
-        messages = [
-            SystemMessage(content=system_message),
-            HumanMessage(content=message)
-        ]
-
-        response = llm.invoke(messages)
-
-        return response
-    
-    def get_structured_resume_data(self, resume_data: str, missing_keywords_data: Dict[str, Any], job_description: str = "") -> Dict[str, Any]:
-        # To get structured and enhanced resume data.
-        json_schema = {
-        "title": "ResumeData",
-        "description": "Structured resume data with enhancements",
-        "type": "object",
-        "properties": {
-            "Most_Match_ROLE": {"type": "string"},
-            "Personal Information": {
-                "type": "object",
-                "properties": {
-                    "Name": {"type": "string"},
-                    "Phone number": {"type": "string"},
-                    "Email": {"type": "string"},
-                    "LinkedIn": {"type": "string"},
-                    "GitHub/portfolio": {"type": "string"}
-                },
-                "required": ["Name", "Phone number", "Email", "LinkedIn", "GitHub/portfolio"]
-            },
-            "Professional Summary": {"type": "string"},
-            "Skills": {"type": "array", "items": {"type": "string"}},
-            "Work Experience": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Company": {"type": "string"},
-                        "Title": {"type": "string"},
-                        "location": {"type": "string"},
-                        "start_date": {"type": "string"},
-                        "end_date":{"type": "string"},
-                        "Descriptions": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["Company", "Title", "location", "start_date", "end_date", "Descriptions"]
-                }
-            },
-            "Education": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Institution": {"type": "string"},
-                        "location": {"type": "string"},
-                        "Degree": {"type": "string"},
-                        "start_date": {"type": "string"},
-                        "end_date":{"type": "string"}
-                    },
-                    "required": ["Institution", "Degree", "location", "start_date", "end_date"]
-                }
-            },
-            "Certifications": {
-                "type": "array",
-                "items": {"type": "string"}
-            },
-            "Projects": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Title": {"type": "string"},
-                        "Description": {"type": "array", "items": {"type": "string"}},
-                        "Technologies": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["Title", "Description", "Technologies"]
-                }
-            },
-            "Other": {
-                "type": "object",
-                "properties": {
-                    "Strengths": {"type": "array", "items": {"type": "string"}},
-                    "Languages": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["Strengths", "Languages"]
-            }
-        },
-        "required": ["Most_Match_ROLE", "Personal Information", "Professional Summary", "Skills", "Work Experience", "Education", "Certifications", "Projects", "Other"]
-        }
-
-        llm = init_chat_model(self.model_name, model_provider=self.model_provider).with_structured_output(json_schema)
-
-        message = self._base_prompt(resume_data, job_description)
-
-        missing_keywords_info = f"\n\nMissing Keywords: {missing_keywords_data.get('missing_keywords', [])}\n"
-
-        system_message = f"""
+STRUCTURED_RESUME_SYSTEM_PROMPT = """
                         You are a professional resume optimizer tasked with transforming resumes to achieve maximum alignment with specific job descriptions and also add related skills to those skills. Your role is to deeply analyze both the candidate's experience and the job description, and then reconstruct the resume to create a compelling, keyword-rich, and contextually aligned document that stands out to hiring managers and ATS systems.
 
                         Your tasks, in priority order:
@@ -182,7 +185,7 @@ class ResumeAnalyzer:
 
                         2. **KEYWORD ENRICHMENT**:
                         - Identify critical keywords and phrases from the job description (including tools, skills, certifications, responsibilities, etc.).
-                        - Seamlessly integrate all missing keywords {missing_keywords_info} across the following sections:
+                        - Seamlessly integrate all missing keywords (listed after the resume and job description) across the following sections:
                             - Professional Summary
                             - Skills
                             - Work Experience
@@ -216,121 +219,13 @@ class ResumeAnalyzer:
                         Your final output **must strictly follow the specified JSON schema** while incorporating the enhancements above.
                         """
 
-        messages = [
-            SystemMessage(content=system_message),
-            HumanMessage(content=message)
-        ]
-
-        response = llm.invoke(messages)
-        
-        # Add missing keywords data
-        # response["Missing Keywords"] = missing_keywords_data.get("missing_keywords", [])
-        # response["Current Score"] = missing_keywords_data.get("current_score", 0)
-        # response["Expected Score"] = missing_keywords_data.get("expected_score", 0)
-        
-        return response
-
-    def get_structured_resume_from_keywords(self, resume_data: str, missing_keywords_data: str) -> Dict[str, Any]:
-        # To get structured resume data based only on resume content and missing keywords (no job description).
-        json_schema = {
-        "title": "ResumeData",
-        "description": "Structured resume data with enhancements",
-        "type": "object",
-        "properties": {
-            "Most_Match_ROLE": {"type": "string"},
-            "Personal Information": {
-                "type": "object",
-                "properties": {
-                    "Name": {"type": "string"},
-                    "Phone number": {"type": "string"},
-                    "Email": {"type": "string"},
-                    "LinkedIn": {"type": "string"},
-                    "GitHub/portfolio": {"type": "string"}
-                },
-                "required": ["Name", "Phone number", "Email", "LinkedIn", "GitHub/portfolio"]
-            },
-            "Professional Summary": {"type": "string"},
-            "Skills": {"type": "array", "items": {"type": "string"}},
-            "Work Experience": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Company": {"type": "string"},
-                        "Title": {"type": "string"},
-                        "location": {"type": "string"},
-                        "start_date": {"type": "string"},
-                        "end_date":{"type": "string"},
-                        "Descriptions": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["Company", "Title", "location", "start_date", "end_date", "Descriptions"]
-                }
-            },
-            "Education": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Institution": {"type": "string"},
-                        "location": {"type": "string"},
-                        "Degree": {"type": "string"},
-                        "start_date": {"type": "string"},
-                        "end_date":{"type": "string"}
-                    },
-                    "required": ["Institution", "Degree", "location", "start_date", "end_date"]
-                }
-            },
-            "Certifications": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Title": {"type": "string"},
-                        "Description": {"type": "string"},
-                    },
-                "required": ["Title", "Description"]
-            }
-            },
-            "Projects": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "Title": {"type": "string"},
-                        "Description": {"type": "array", "items": {"type": "string"}},
-                        "Technologies": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["Title", "Description", "Technologies"]
-                }
-            },
-            "Other": {
-                "type": "object",
-                "properties": {
-                    "Strengths": {"type": "array", "items": {"type": "string"}},
-                    "Languages": {"type": "array", "items": {"type": "string"}}
-                },
-                "required": ["Strengths", "Languages"]
-            }
-        },
-        "required": ["Most_Match_ROLE", "Personal Information", "Professional Summary", "Skills", "Work Experience", "Education", "Certifications", "Projects", "Other"]
-        }
-
-        llm = init_chat_model(self.model_name, model_provider=self.model_provider).with_structured_output(json_schema)
-
-        # Create a message without job description
-        message = f"""
-        Resume Data = "{resume_data}"
-        """
-
-        missing_keywords_info = f"\n\nMissing Keywords: {missing_keywords_data}\n"
-
-        system_message = f"""You are a professional resume optimizer that enhances resumes by incorporating specific skills and keywords. Your primary goal is to make the candidate's resume as appealing as possible.        
+STRUCTURED_RESUME_FROM_KEYWORDS_SYSTEM_PROMPT = """You are a professional resume optimizer that enhances resumes by incorporating specific skills and keywords. Your primary goal is to make the candidate's resume as appealing as possible.        
             
             Your tasks in order of priority:
             
             1. ANALYZE THE RESUME: Thoroughly review the resume content to understand the candidate's experience, skills, and career trajectory.
             
-            2. KEYWORD OPTIMIZATION: Incorporate all the missing keywords{missing_keywords_info} naturally throughout the resume, especially in:
+            2. KEYWORD OPTIMIZATION: Incorporate all the missing keywords (listed after the resume) naturally throughout the resume, especially in:
                - Professional Summary
                - Skills section
                - Work Experience descriptions
@@ -353,17 +248,437 @@ class ResumeAnalyzer:
             
             The response MUST conform to the provided JSON schema structure."""
 
-        messages = [
-            SystemMessage(content=system_message),
-            HumanMessage(content=message)
+# Section schemas for the "sections" generation mode. The skeleton holds the facts
+# that are only extracted, never rewritten; every other section is written by its own
+# call and merged into the ResumeData schema.
+SKELETON_SCHEMA = {
+    "title": "ResumeSkeleton",
+    "description": "Facts extracted from the resume as written",
+    "type": "object",
+    "properties": {
+        "Personal Information": PERSONAL_INFORMATION_SCHEMA,
+        "Work Experience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "Company": {"type": "string"},
+                    "Title": {"type": "string"},
+                    "location": {"type": "string"},
+                    "start_date": {"type": "string"},
+                    "end_date": {"type": "string"}
+                },
+                "required": ["Company", "Title", "location", "start_date", "end_date"]
+            }
+        },
+        "Education": EDUCATION_SCHEMA,
+        "Project Titles": {"type": "array", "items": {"type": "string"}},
+        "Other": OTHER_SCHEMA
+    },
+    "required": ["Personal Information", "Work Experience", "Education", "Project Titles", "Other"]
+}
+
+SUMMARY_SCHEMA = {
+    "title": "ResumeSummary",
+    "description": "Role match and professional summary",
+    "type": "object",
+    "properties": {
+        "Most_Match_ROLE": {"type": "string"},
+        "Professional Summary": {"type": "string"}
+    },
+    "required": ["Most_Match_ROLE", "Professional Summary"]
+}
+
+EXPERIENCE_ENTRY_SCHEMA = {
+    "title": "WorkExperienceEntry",
+    "description": "Rewritten bullet points of one work experience entry",
+    "type": "object",
+    "properties": {
+        "Descriptions": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["Descriptions"]
+}
+
+PROJECTS_SECTION_SCHEMA = {
+    "title": "ResumeProjects",
+    "description": "Rewritten projects",
+    "type": "object",
+    "properties": {"Projects": PROJECTS_SCHEMA},
+    "required": ["Projects"]
+}
+
+SKILLS_SECTION_SCHEMA = {
+    "title": "ResumeSkills",
+    "description": "Skills and certifications",
+    "type": "object",
+    "properties": {
+        "Skills": {"type": "array", "items": {"type": "string"}},
+        "Certifications": CERTIFICATION_NAMES_SCHEMA
+    },
+    "required": ["Skills", "Certifications"]
+}
+
+SKILLS_WITH_CERTIFICATION_DETAILS_SCHEMA = {
+    **SKILLS_SECTION_SCHEMA,
+    "title": "ResumeSkillsWithCertificationDetails",
+    "properties": {**SKILLS_SECTION_SCHEMA["properties"], "Certifications": CERTIFICATION_OBJECTS_SCHEMA}
+}
+
+SKELETON_SYSTEM_PROMPT = """You extract facts from a resume. Copy them exactly as written: personal information, every work experience entry (company, title, location, dates) in resume order, education, project titles, strengths and languages. Do not rewrite, enhance or invent anything; use an empty string for missing values.
+
+        The response MUST conform to the provided JSON schema structure."""
+
+
+def section_system_prompt(instructions: str) -> str:
+    return f"""You are a professional resume optimizer. You are writing one section of a resume that is being enhanced section by section; other sections are written separately.
+
+        {instructions}
+
+        Seamlessly integrate the relevant missing keywords (listed after the resume). Use varied phrasing and synonyms, stay truthful to the candidate's background, and think like a recruiter and an ATS.
+
+        The response MUST conform to the provided JSON schema structure."""
+
+
+SECTION_SYSTEM_PROMPTS = {
+    "summary": section_system_prompt(
+        """Write a persuasive, 3-5 sentence professional summary that positions the candidate as an ideal fit, emphasizing total years of experience, domain expertise, standout accomplishments and alignment with the target role. Also suggest the job title the candidate is most suitably positioned for (Most_Match_ROLE)."""),
+    "skills": section_system_prompt(
+        """List the candidate's skills, adding closely related skills, and their certifications."""),
+    "experience": section_system_prompt(
+        """Rewrite the work experience entry given after the resume as at least 5 bullet points that:
+        - Reflect job-specific responsibilities and achievements
+        - Include metrics, KPIs, or performance indicators to show measurable impact
+        - Use industry-specific terminology
+        - Begin with varied, dynamic action verbs
+        - Add brief context when necessary to show scope and scale"""),
+    "projects": section_system_prompt(
+        """Rewrite the candidate's projects (titles given after the resume), each with a title, bullet point descriptions that show impact, and the technologies used."""),
+}
+
+
+class ResumeAnalyzer:
+    # Class for analyzing resumes against job descriptions
+
+    def __init__(self, model_name: str = LLM_MODEL_NAME, model_provider: str = LLM_MODEL_PROVIDER, use_cache: bool = True,
+                 generation_mode: str = RESUME_GENERATION_MODE):
+        # Environment variables are loaded once per process by resume_analysis.settings
+
+        # Set OpenAI API key if not already set
+        if not os.environ.get("OPENAI_API_KEY"):
+            os.environ["OPENAI_API_KEY"] = getpass.getpass("Enter your OpenAI API key: ")
+
+        self.model_name = model_name
+        self.model_provider = model_provider
+        self.cache = get_llm_cache() if use_cache else None
+        self.generation_mode = generation_mode
+
+    def _base_prompt(self, resume_data: str, job_description: str) -> str:
+        # Helper function to prepare the prompt
+        return f"""
+        Resume Data = "{resume_data}" and Job Description = "{job_description}"
+        """
+
+    def _resume_prompt(self, resume_data: str) -> str:
+        # Create a message without job description
+        return f"""
+        Resume Data = "{resume_data}"
+        """
+
+    def _keywords_prompt(self, missing_keywords: Any) -> str:
+        return f"""
+        Missing Keywords = {missing_keywords}
+        """
+
+    def _cache_key(self, request: LLMRequest) -> Optional[str]:
+        # The key covers the method, model, system prompt and normalized inputs
+        if self.cache is None:
+            return None
+        return self.cache.make_key(request.method, self.model_name, self.model_provider,
+                                   request.system_message, *request.inputs)
+
+    def _record_usage(self, request: LLMRequest, usage: Dict[str, Any], response: Any) -> int:
+        # Count the tokens in and out of one model call in LLM_TOKENS and return their total. Counts come
+        # from the provider's usage metadata, or from the tokenizer when it doesn't report them.
+        input_tokens = sum(u.get("input_tokens", 0) for u in usage.values())
+        output_tokens = sum(u.get("output_tokens", 0) for u in usage.values())
+        # Prompt prefix tokens served from the provider's prompt cache
+        cached_tokens = sum((u.get("input_token_details") or {}).get("cache_read", 0) for u in usage.values())
+        if not input_tokens:
+            input_tokens = count_tokens(request.system_message) + count_tokens(request.message)
+        if not output_tokens and response is not None:
+            output_tokens = count_tokens(json.dumps(response, ensure_ascii=False))
+        LLM_TOKENS.labels(request.method, "input").inc(input_tokens)
+        LLM_TOKENS.labels(request.method, "cached_input").inc(cached_tokens)
+        LLM_TOKENS.labels(request.method, "output").inc(output_tokens)
+        return input_tokens + output_tokens
+
+    def _messages(self, request: LLMRequest) -> list:
+        return [
+            SystemMessage(content=request.system_message),
+            HumanMessage(content=request.message)
         ]
 
-        response = llm.invoke(messages)
-        
+    def _scheduler(self) -> Optional[LLMScheduler]:
+        # Cluster-wide rate limits, adaptive concurrency and retries of this process's calls
+        return get_scheduler(self.model_name, self.model_provider) if LLM_SCHEDULER_ENABLED else None
+
+    def _estimate_tokens(self, request: LLMRequest) -> int:
+        # Tokens reserved from the scheduler's token bucket before the call
+        return count_tokens(request.system_message) + count_tokens(request.message) + LLM_OUTPUT_TOKENS_ESTIMATE
+
+    def _invoke(self, request: LLMRequest) -> Dict[str, Any]:
+        # Helper function to run a prompt through the response cache.
+        # The pooled model client is only looked up on a miss.
+        key = self._cache_key(request)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        usage = UsageMetadataCallbackHandler()
+
+        def call():
+            return request.llm_factory().invoke(self._messages(request), config={"callbacks": [usage]})
+
+        scheduler = self._scheduler()
+        if scheduler is None:
+            response = call()
+            self._record_usage(request, usage.usage_metadata, response)
+        else:
+            estimate = self._estimate_tokens(request)
+            response = scheduler.run(estimate, call)
+            scheduler.settle(estimate, self._record_usage(request, usage.usage_metadata, response))
+
+        if key is not None and response is not None:
+            self.cache.set(key, response)
+        return response
+
+    async def _ainvoke(self, request: LLMRequest) -> Dict[str, Any]:
+        # Async counterpart of _invoke, bounded by the per-loop LLM concurrency cap
+        key = self._cache_key(request)
+        if key is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        usage = UsageMetadataCallbackHandler()
+
+        async def call():
+            async with llm_semaphore():
+                return await request.llm_factory().ainvoke(self._messages(request), config={"callbacks": [usage]})
+
+        scheduler = self._scheduler()
+        if scheduler is None:
+            response = await call()
+            self._record_usage(request, usage.usage_metadata, response)
+        else:
+            estimate = self._estimate_tokens(request)
+            response = await scheduler.arun(estimate, call)
+            await scheduler.asettle(estimate, self._record_usage(request, usage.usage_metadata, response))
+
+        if key is not None and response is not None:
+            await asyncio.to_thread(self.cache.set, key, response)
+        return response
+
+    def _stream(self, request: LLMRequest) -> Iterator[Dict[str, Any]]:
+        # Streaming counterpart of _invoke. The structured output parser turns the
+        # token stream into progressively more complete objects (partial JSON), each
+        # one yielded as it parses. A cached response is yielded once, complete.
+        key = self._cache_key(request)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        response = None
+        usage = UsageMetadataCallbackHandler()
+        scheduler = self._scheduler()
+        estimate = self._estimate_tokens(request)
+        # Partials already yielded can't be taken back, so a stream is scheduled but not retried
+        with scheduler.slot(estimate) if scheduler is not None else nullcontext():
+            for partial in request.llm_factory().stream(self._messages(request), config={"callbacks": [usage]}):
+                if partial is not None:
+                    response = partial
+                    yield partial
+        total_tokens = self._record_usage(request, usage.usage_metadata, response)
+        if scheduler is not None:
+            scheduler.settle(estimate, total_tokens)
+
+        if key is not None and response is not None:
+            self.cache.set(key, response)
+
+    def get_missing_keywords(self, resume_data: str, job_description: str,
+                             candidate_keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+        #Function used to extract missing keyword, current_score and expected_score.
+        return self._invoke(self._missing_keywords_request(resume_data, job_description, candidate_keywords))
+
+    async def aget_missing_keywords(self, resume_data: str, job_description: str,
+                                    candidate_keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+        return await self._ainvoke(self._missing_keywords_request(resume_data, job_description, candidate_keywords))
+
+    def _missing_keywords_request(self, resume_data: str, job_description: str,
+                                  candidate_keywords: Optional[List[str]] = None) -> LLMRequest:
+        # Cleaned and held to the token budgets before they reach the prompt
+        resume_data, job_description = compact_resume(resume_data), compact_job_description(job_description)
+        message = self._base_prompt(resume_data, job_description)
+
+        # Keywords the local matcher already found missing, as a starting point for the model
+        if candidate_keywords:
+            message += f"""
+        Candidate Missing Keywords (pre-computed, verify and extend) = {candidate_keywords}
+        """
+
+        # Reuse the pooled chat model of this process
+        def llm_factory():
+            return get_chat_model(self.model_name, self.model_provider, method="json_mode")
+
+        return LLMRequest("get_missing_keywords", llm_factory, MISSING_KEYWORDS_SYSTEM_PROMPT, message,
+                          (resume_data, job_description, candidate_keywords or []))
+    
+    def get_structured_resume_data(self, resume_data: str, missing_keywords_data: Dict[str, Any], job_description: str = "") -> Dict[str, Any]:
+        # To get structured and enhanced resume data.
+        if self.generation_mode == "sections":
+            return run_coroutine(self.aget_structured_resume_data(resume_data, missing_keywords_data, job_description))
+        response = self._invoke(self._structured_resume_request(resume_data, missing_keywords_data, job_description))
+
+        # Add missing keywords data
+        # response["Missing Keywords"] = missing_keywords_data.get("missing_keywords", [])
+        # response["Current Score"] = missing_keywords_data.get("current_score", 0)
+        # response["Expected Score"] = missing_keywords_data.get("expected_score", 0)
+
+        return response
+
+    async def aget_structured_resume_data(self, resume_data: str, missing_keywords_data: Dict[str, Any], job_description: str = "") -> Dict[str, Any]:
+        if self.generation_mode == "sections":
+            return await self._agenerate_sections(self._base_prompt(compact_resume(resume_data),
+                                                                    compact_job_description(job_description)),
+                                                  missing_keywords_data.get('missing_keywords', []),
+                                                  SKILLS_SECTION_SCHEMA)
+        return await self._ainvoke(self._structured_resume_request(resume_data, missing_keywords_data, job_description))
+
+    def stream_structured_resume_data(self, resume_data: str, missing_keywords_data: Dict[str, Any], job_description: str = "") -> Iterator[Dict[str, Any]]:
+        # Yields the partially parsed resume while the model is still generating it.
+        # Section-parallel generation has no single stream, the merged resume is yielded once.
+        if self.generation_mode == "sections":
+            return iter([self.get_structured_resume_data(resume_data, missing_keywords_data, job_description)])
+        return self._stream(self._structured_resume_request(resume_data, missing_keywords_data, job_description))
+
+    def _structured_resume_request(self, resume_data: str, missing_keywords_data: Dict[str, Any], job_description: str = "") -> LLMRequest:
+        resume_data, job_description = compact_resume(resume_data), compact_job_description(job_description)
+        # Per-request data goes last, after the static system prompt
+        message = self._base_prompt(resume_data, job_description)
+        message += self._keywords_prompt(missing_keywords_data.get('missing_keywords', []))
+
+        def llm_factory():
+            return get_chat_model(self.model_name, self.model_provider, RESUME_DATA_SCHEMA)
+
+        return LLMRequest("get_structured_resume_data", llm_factory, STRUCTURED_RESUME_SYSTEM_PROMPT, message,
+                          (resume_data, missing_keywords_data, job_description))
+
+    def get_structured_resume_from_keywords(self, resume_data: str, missing_keywords_data: str) -> Dict[str, Any]:
+        # To get structured resume data based only on resume content and missing keywords (no job description).
+        if self.generation_mode == "sections":
+            return run_coroutine(self.aget_structured_resume_from_keywords(resume_data, missing_keywords_data))
+        response = self._invoke(self._structured_resume_from_keywords_request(resume_data, missing_keywords_data))
+
         # # Add missing keywords data
         # response["Missing Keywords"] = missing_keywords_data.get("missing_keywords", [])
         # response["Current Score"] = missing_keywords_data.get("current_score", 0)
         # response["Expected Score"] = missing_keywords_data.get("expected_score", 0)
-        
+
         return response
 
+    async def aget_structured_resume_from_keywords(self, resume_data: str, missing_keywords_data: str) -> Dict[str, Any]:
+        if self.generation_mode == "sections":
+            return await self._agenerate_sections(self._resume_prompt(compact_resume(resume_data)),
+                                                  missing_keywords_data, SKILLS_WITH_CERTIFICATION_DETAILS_SCHEMA)
+        return await self._ainvoke(self._structured_resume_from_keywords_request(resume_data, missing_keywords_data))
+
+    def stream_structured_resume_from_keywords(self, resume_data: str, missing_keywords_data: str) -> Iterator[Dict[str, Any]]:
+        if self.generation_mode == "sections":
+            return iter([self.get_structured_resume_from_keywords(resume_data, missing_keywords_data)])
+        return self._stream(self._structured_resume_from_keywords_request(resume_data, missing_keywords_data))
+
+    def _structured_resume_from_keywords_request(self, resume_data: str, missing_keywords_data: str) -> LLMRequest:
+        # Create a message without job description
+        resume_data = compact_resume(resume_data)
+        message = self._resume_prompt(resume_data) + self._keywords_prompt(missing_keywords_data)
+
+        def llm_factory():
+            return get_chat_model(self.model_name, self.model_provider, RESUME_FROM_KEYWORDS_SCHEMA)
+
+        return LLMRequest("get_structured_resume_from_keywords", llm_factory, STRUCTURED_RESUME_FROM_KEYWORDS_SYSTEM_PROMPT, message,
+                          (resume_data, missing_keywords_data))
+
+    # Section-parallel generation ("sections" mode): a cheap skeleton pass extracts the
+    # facts, then the summary, skills, each work experience entry and the projects are
+    # written by concurrent calls, so latency follows the slowest section instead of
+    # the whole resume.
+
+    def _section_request(self, section: str, json_schema: Dict[str, Any], message: str,
+                         missing_keywords: Any, details: str = "") -> LLMRequest:
+        # Static per-section system prompt, the section's own data and the keywords go last
+        message += details + self._keywords_prompt(missing_keywords)
+
+        def llm_factory():
+            return get_chat_model(self.model_name, self.model_provider, json_schema)
+
+        return LLMRequest(f"resume_section:{section}", llm_factory, SECTION_SYSTEM_PROMPTS[section], message,
+                          (json_schema["title"], message))
+
+    def _skeleton_request(self, message: str) -> LLMRequest:
+        def llm_factory():
+            return get_chat_model(self.model_name, self.model_provider, SKELETON_SCHEMA)
+
+        return LLMRequest("resume_section:skeleton", llm_factory, SKELETON_SYSTEM_PROMPT, message, (message,))
+
+    async def _awrite_experience(self, message: str, missing_keywords: Any, entry: Dict[str, Any]) -> Dict[str, Any]:
+        section = await self._ainvoke(self._section_request(
+            "experience", EXPERIENCE_ENTRY_SCHEMA, message, missing_keywords,
+            f"\n        Work Experience Entry = {json.dumps(entry, ensure_ascii=False)}\n"))
+        return {**entry, "Descriptions": (section or {}).get("Descriptions", [])}
+
+    async def _awrite_projects(self, message: str, missing_keywords: Any,
+                               skeleton_task: "asyncio.Task") -> List[Dict[str, Any]]:
+        skeleton = (await skeleton_task) or {}
+        section = await self._ainvoke(self._section_request(
+            "projects", PROJECTS_SECTION_SCHEMA, message, missing_keywords,
+            f"\n        Project Titles = {json.dumps(skeleton.get('Project Titles', []), ensure_ascii=False)}\n"))
+        return (section or {}).get("Projects", [])
+
+    async def _agenerate_sections(self, message: str, missing_keywords: Any,
+                                  skills_schema: Dict[str, Any]) -> Dict[str, Any]:
+        # The summary and skills don't depend on the skeleton, so they start right away
+        skeleton_task = asyncio.ensure_future(self._ainvoke(self._skeleton_request(message)))
+        summary_task = asyncio.ensure_future(self._ainvoke(self._section_request(
+            "summary", SUMMARY_SCHEMA, message, missing_keywords)))
+        skills_task = asyncio.ensure_future(self._ainvoke(self._section_request(
+            "skills", skills_schema, message, missing_keywords)))
+        projects_task = asyncio.ensure_future(self._awrite_projects(message, missing_keywords, skeleton_task))
+
+        try:
+            skeleton = (await skeleton_task) or {}
+            experience = await asyncio.gather(*[
+                self._awrite_experience(message, missing_keywords, entry)
+                for entry in skeleton.get("Work Experience", [])
+            ])
+            summary, skills, projects = await asyncio.gather(summary_task, skills_task, projects_task)
+        except BaseException:
+            for task in (skeleton_task, summary_task, skills_task, projects_task):
+                task.cancel()
+            raise
+
+        summary, skills = summary or {}, skills or {}
+        # Merged in the order of the ResumeData schema
+        return {
+            "Most_Match_ROLE": summary.get("Most_Match_ROLE", ""),
+            "Personal Information": skeleton.get("Personal Information", {}),
+            "Professional Summary": summary.get("Professional Summary", ""),
+            "Skills": skills.get("Skills", []),
+            "Work Experience": list(experience),
+            "Education": skeleton.get("Education", []),
+            "Certifications": skills.get("Certifications", []),
+            "Projects": projects,
+            "Other": skeleton.get("Other", {"Strengths": [], "Languages": []})
+        }
@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+from langchain.chat_models import init_chat_model
+
+from resume_analysis import settings
+
+# Long-lived chat model clients, one per (model, provider) and one structured
+# wrapper per output schema. Registries are per process: they are rebuilt after a
+# fork so pooled connections are never shared between Celery worker processes.
+_lock = threading.Lock()
+_owner_pid: Optional[int] = None
+_base_models: Dict[Tuple[str, str], Any] = {}
+_structured_models: Dict[Tuple[str, str, str], Any] = {}
+_http_clients: Dict[str, Any] = {}
+
+
+def _reset_if_forked() -> None:
+    global _owner_pid
+    if _owner_pid != os.getpid():
+        _base_models.clear()
+        _structured_models.clear()
+        _http_clients.clear()
+        _owner_pid = os.getpid()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY
+    )
+
+
+def _get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    # Shared keep-alive connection pools for every model in this process
+    if "sync" not in _http_clients:
+        timeout = httpx.Timeout(settings.LLM_REQUEST_TIMEOUT, connect=10.0)
+        _http_clients["sync"] = httpx.Client(limits=_pool_limits(), timeout=timeout)
+        _http_clients["async"] = httpx.AsyncClient(limits=_pool_limits(), timeout=timeout)
+    return _http_clients["sync"], _http_clients["async"]
+
+
+def _schema_key(schema: Optional[Dict[str, Any]], method: Optional[str]) -> str:
+    if schema is None:
+        return f"method:{method}"
+    payload = json.dumps(schema, sort_keys=True)
+    return f"schema:{method}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def get_base_model(model_name: str, model_provider: str):
+    # Return the pooled chat model for (model, provider), building it on first use
+    key = (model_name, model_provider)
+    with _lock:
+        _reset_if_forked()
+        model = _base_models.get(key)
+        if model is None:
+            kwargs: Dict[str, Any] = {}
+            if model_provider == "openai":
+                http_client, http_async_client = _get_http_clients()
+                kwargs.update(http_client=http_client, http_async_client=http_async_client)
+            if settings.LLM_SCHEDULER_ENABLED:
+                # Retries are left to the scheduler, which has to see the 429s
+                kwargs["max_retries"] = 0
+            model = init_chat_model(model_name, model_provider=model_provider, **kwargs)
+            _base_models[key] = model
+        return model
+
+
+def get_chat_model(model_name: str, model_provider: str, schema: Optional[Dict[str, Any]] = None,
+                   method: Optional[str] = None):
+    # Return the structured-output runnable for (model, provider, output schema)
+    key = (model_name, model_provider, _schema_key(schema, method))
+    with _lock:
+        _reset_if_forked()
+        model = _structured_models.get(key)
+    if model is not None:
+        return model
+
+    base = get_base_model(model_name, model_provider)
+    if schema is None:
+        model = base.with_structured_output(method=method)
+    elif method is None:
+        model = base.with_structured_output(schema)
+    else:
+        model = base.with_structured_output(schema, method=method)
+
+    with _lock:
+        return _structured_models.setdefault(key, model)
+
+
+def init_clients(models: Iterable[Tuple[str, str]]) -> None:
+    # Build clients up front (called from the Celery worker_process_init hook)
+    for model_name, model_provider in models:
+        get_base_model(model_name, model_provider)
+
+
+def _close_async_client(client: httpx.AsyncClient) -> None:
+    # Connections belong to the loop that opened them: the shared loop in async mode.
+    # Must run before that loop is shut down.
+    from resume_analysis.async_runtime import current_loop
+    loop = current_loop()
+    if loop is not None:
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=10)
+    else:
+        asyncio.run(client.aclose())
+
+
+def close_clients() -> None:
+    # Close pooled connections on worker shutdown
+    with _lock:
+        sync_client = _http_clients.pop("sync", None)
+        async_client = _http_clients.pop("async", None)
+        _base_models.clear()
+        _structured_models.clear()
+    if sync_client is not None:
+        sync_client.close()
+    if async_client is not None:
+        try:
+            _close_async_client(async_client)
+        except Exception as e:
+            print(f"Warning: could not close the async HTTP client: {str(e)}")
@@ -0,0 +1,349 @@
+import asyncio
+import datetime
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from resume_analysis import settings
+from resume_analysis.metrics import (LLM_CALLS, LLM_CONCURRENCY_LIMIT, LLM_IN_FLIGHT, LLM_RATE_LIMIT_WAIT_SECONDS,
+                                     LLM_RETRIES, LLM_THROTTLED)
+from resume_analysis.progress import get_async_redis, get_redis
+
+# Scheduling of LLM calls across the cluster. Every call first takes a request and its
+# estimated tokens from Redis token buckets shared by all workers (refilled at the
+# provider's per-minute limits, minus some headroom), then a slot from this process's
+# adaptive concurrency limit (AIMD: additive increase on success, multiplicative
+# decrease on 429s and slow calls). Retryable failures back off with jitter; a
+# provider Retry-After pauses the whole cluster for that long.
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APITimeoutError", "APIConnectionError", "TimeoutException", "ConnectError", "ReadTimeout",
+                    "RemoteProtocolError"}
+
+# KEYS: request bucket, token bucket, pause key. ARGV: request rate and capacity, token
+# rate and capacity (rates per second, 0 disables a bucket), tokens needed.
+# Returns "0" when both buckets had enough (and takes from them), else seconds to wait.
+_ACQUIRE_SCRIPT = """
+local pause = redis.call('PTTL', KEYS[3])
+if pause > 0 then
+    return tostring(pause / 1000)
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local function level(key, rate, capacity)
+    if rate <= 0 then
+        return nil
+    end
+    local bucket = redis.call('HMGET', key, 'tokens', 'timestamp')
+    local tokens = tonumber(bucket[1]) or capacity
+    local timestamp = tonumber(bucket[2]) or now
+    return math.min(capacity, tokens + math.max(0, now - timestamp) * rate)
+end
+
+local request_rate, request_capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local token_rate, token_capacity = tonumber(ARGV[3]), tonumber(ARGV[4])
+local needed = math.min(tonumber(ARGV[5]), token_capacity)
+local requests = level(KEYS[1], request_rate, request_capacity)
+local tokens = level(KEYS[2], token_rate, token_capacity)
+
+local wait = 0
+if requests and requests < 1 then
+    wait = math.max(wait, (1 - requests) / request_rate)
+end
+if tokens and tokens < needed then
+    wait = math.max(wait, (needed - tokens) / token_rate)
+end
+if wait > 0 then
+    return tostring(wait)
+end
+if requests then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(requests - 1), 'timestamp', tostring(now))
+    redis.call('EXPIRE', KEYS[1], 120)
+end
+if tokens then
+    redis.call('HSET', KEYS[2], 'tokens', tostring(tokens - needed), 'timestamp', tostring(now))
+    redis.call('EXPIRE', KEYS[2], 120)
+end
+return "0"
+"""
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    # Seconds the provider asked us to wait, from Retry-After(-Ms) headers
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            date = email.utils.parsedate_to_datetime(value)
+            return max(0.0, (date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def backoff_delay(attempt: int, error: BaseException) -> float:
+    # Full jitter exponential backoff; a Retry-After is honored, plus a little jitter
+    # so the callers it released don't all retry at the same instant
+    delay = retry_after(error)
+    if delay is not None:
+        return delay + random.uniform(0, settings.LLM_BACKOFF_BASE)
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+class AdaptiveConcurrency:
+    # AIMD concurrency limit shared by the threads and the event loop of a process
+
+    def __init__(self, minimum: int = settings.LLM_MIN_CONCURRENCY, maximum: int = settings.LLM_MAX_CONCURRENCY,
+                 latency_target: float = settings.LLM_LATENCY_TARGET):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.latency_target = latency_target
+        self.limit = float(max(self.minimum, self.maximum // 2))
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters: deque = deque()
+
+    def _try_acquire(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def _wake(self) -> None:
+        # Called with the lock held: let every waiter re-check the limit
+        self._condition.notify_all()
+        while self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def acquire(self) -> None:
+        with self._condition:
+            while not self._try_acquire():
+                self._condition.wait()
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            await future
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            elif latency is not None and self.latency_target and latency > self.latency_target:
+                self.limit = max(self.minimum, self.limit * 0.9)
+            elif latency is not None:
+                # About +1 per limit's worth of successful calls
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMScheduler:
+
+    def __init__(self, model_name: str, model_provider: str,
+                 rpm_limit: int = settings.LLM_RPM_LIMIT, tpm_limit: int = settings.LLM_TPM_LIMIT):
+        key = f"llm-rate:{model_provider}:{model_name}"
+        self.keys = [f"{key}:requests", f"{key}:tokens", f"{key}:pause"]
+        headroom = settings.LLM_RATE_HEADROOM
+        self.request_rate = rpm_limit * headroom / 60
+        self.token_rate = tpm_limit * headroom / 60
+        # Buckets hold a few seconds of traffic, so a burst can't blow through a minute's quota
+        self.request_capacity = max(1.0, self.request_rate * settings.LLM_RATE_BURST_SECONDS)
+        self.token_capacity = max(1.0, self.token_rate * settings.LLM_RATE_BURST_SECONDS)
+        self.concurrency = AdaptiveConcurrency()
+        self.model = f"{model_provider}:{model_name}"
+        LLM_CONCURRENCY_LIMIT.labels(self.model).set(int(self.concurrency.limit))
+
+    def _acquire_args(self, tokens: int) -> list:
+        return [self.request_rate, self.request_capacity, self.token_rate, self.token_capacity, tokens]
+
+    def wait_for_budget(self, tokens: int) -> None:
+        # Block until the shared buckets grant one request and `tokens` tokens and no
+        # cluster-wide pause is in effect. When Redis can't be reached, calls go ahead
+        # unscheduled rather than stall.
+        while True:
+            try:
+                wait = float(get_redis().eval(_ACQUIRE_SCRIPT, 3, *self.keys, *self._acquire_args(tokens)))
+            except Exception as e:
+                print(f"Warning: LLM rate limiter unavailable, not scheduling: {str(e)}")
+                return
+            if wait <= 0:
+                return
+            LLM_RATE_LIMIT_WAIT_SECONDS.inc(wait)
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    async def await_budget(self, tokens: int) -> None:
+        while True:
+            try:
+                wait = float(await get_async_redis().eval(_ACQUIRE_SCRIPT, 3, *self.keys, *self._acquire_args(tokens)))
+            except Exception as e:
+                print(f"Warning: LLM rate limiter unavailable, not scheduling: {str(e)}")
+                return
+            if wait <= 0:
+                return
+            LLM_RATE_LIMIT_WAIT_SECONDS.inc(wait)
+            await asyncio.sleep(wait + random.uniform(0, 0.05))
+
+    def _taken(self, estimated_tokens: int) -> float:
+        # Estimates larger than the bucket are taken as a full bucket, the rest is charged on settle
+        return min(estimated_tokens, self.token_capacity)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        # Return (or charge) the difference between the tokens taken from the bucket
+        # and what the call actually used
+        if self.token_rate <= 0 or not actual_tokens:
+            return
+        try:
+            get_redis().hincrbyfloat(self.keys[1], "tokens", self._taken(estimated_tokens) - actual_tokens)
+        except Exception as e:
+            print(f"Warning: could not settle LLM token usage: {str(e)}")
+
+    async def asettle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self.token_rate <= 0 or not actual_tokens:
+            return
+        try:
+            await get_async_redis().hincrbyfloat(self.keys[1], "tokens", self._taken(estimated_tokens) - actual_tokens)
+        except Exception as e:
+            print(f"Warning: could not settle LLM token usage: {str(e)}")
+
+    def _throttle(self, error: BaseException) -> None:
+        # A 429 pauses every worker for the provider's Retry-After
+        LLM_THROTTLED.labels(self.model).inc()
+        delay = retry_after(error)
+        if delay:
+            try:
+                get_redis().set(self.keys[2], "1", px=int(delay * 1000))
+            except Exception as e:
+                print(f"Warning: could not share LLM rate limit pause: {str(e)}")
+
+    def _started(self) -> None:
+        LLM_CALLS.labels(self.model).inc()
+        LLM_IN_FLIGHT.labels(self.model).inc()
+
+    def _release(self, started: float, error: Optional[BaseException]) -> None:
+        self.concurrency.release(latency=None if error is not None else time.monotonic() - started,
+                                 throttled=error is not None and status_code(error) == 429)
+        LLM_IN_FLIGHT.labels(self.model).dec()
+        LLM_CONCURRENCY_LIMIT.labels(self.model).set(int(self.concurrency.limit))
+
+    @contextmanager
+    def slot(self, tokens: int):
+        # One scheduled call, without retries (used for streaming)
+        self.wait_for_budget(tokens)
+        self.concurrency.acquire()
+        self._started()
+        started = time.monotonic()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(started, error)
+            if error is not None and status_code(error) == 429:
+                self._throttle(error)
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int):
+        await self.await_budget(tokens)
+        await self.concurrency.acquire_async()
+        self._started()
+        started = time.monotonic()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(started, error)
+            if error is not None and status_code(error) == 429:
+                await asyncio.to_thread(self._throttle, error)
+
+    def run(self, tokens: int, call: Callable[[], Any]) -> Any:
+        # Run call() in a scheduled slot, retrying retryable failures
+        attempt = 0
+        while True:
+            try:
+                with self.slot(tokens):
+                    return call()
+            except Exception as e:
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, e)
+                print(f"Warning: LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                LLM_RETRIES.labels(type(e).__name__).inc()
+                attempt += 1
+                time.sleep(delay)
+
+    async def arun(self, tokens: int, call: Callable[[], Awaitable[Any]]) -> Any:
+        attempt = 0
+        while True:
+            try:
+                async with self.aslot(tokens):
+                    return await call()
+            except Exception as e:
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, e)
+                print(f"Warning: LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                LLM_RETRIES.labels(type(e).__name__).inc()
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+_lock = threading.Lock()
+_owner_pid: Optional[int] = None
+_schedulers: Dict[Tuple[str, str], LLMScheduler] = {}
+
+
+def get_scheduler(model_name: str, model_provider: str) -> LLMScheduler:
+    # One scheduler per (model, provider) and process; rebuilt after a fork, its locks
+    # and in-flight counts belong to the parent
+    global _owner_pid
+    with _lock:
+        if _owner_pid != os.getpid():
+            _schedulers.clear()
+            _owner_pid = os.getpid()
+        key = (model_name, model_provider)
+        if key not in _schedulers:
+            _schedulers[key] = LLMScheduler(model_name, model_provider)
+        return _schedulers[key]
@@ -0,0 +1,101 @@
+import os
+from typing import Tuple
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess, start_http_server)
+
+from resume_analysis import settings
+
+# Prometheus metrics of every pipeline stage. Each process records its own samples;
+# when PROMETHEUS_MULTIPROC_DIR points at a directory shared by the processes of a
+# host (API workers, prefork children, render and extraction pools) they are written
+# there and the exporters serve their sum. The directory must be emptied before the
+# processes start.
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# LLM calls take seconds to minutes, the default buckets stop at 10s
+LLM_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+
+UPLOAD_WRITE_SECONDS = Histogram(
+    "resume_upload_write_seconds", "Streaming an upload to the upload store", ["extension"])
+TEXT_EXTRACTION_SECONDS = Histogram(
+    "resume_text_extraction_seconds", "Text extraction of one document, cache misses only", ["format", "pages"])
+ANALYZER_SECONDS = Histogram(
+    "resume_analyzer_seconds", "ResumeAnalyzer method calls, including cache hits", ["method"], buckets=LLM_BUCKETS)
+DB_SECONDS = Histogram(
+    "resume_db_seconds", "Analysis database operations", ["operation"])
+RENDER_SECONDS = Histogram(
+    "resume_render_seconds", "Resume rendering steps: template to HTML, HTML to PDF, PDF to disk", ["step"])
+
+LLM_TOKENS = Counter(
+    "llm_tokens", "LLM tokens by analyzer request and kind (input, cached_input, output)", ["method", "kind"])
+LLM_RETRIES = Counter(
+    "llm_retries", "LLM calls retried by the scheduler", ["error_type"])
+LLM_RATE_LIMIT_WAIT_SECONDS = Counter(
+    "llm_rate_limit_wait_seconds", "Time spent waiting for the shared LLM rate limits")
+LLM_CALLS = Counter(
+    "llm_calls", "LLM calls started by the scheduler, including retries", ["model"])
+LLM_THROTTLED = Counter(
+    "llm_throttled", "LLM calls refused by the provider with 429", ["model"])
+# Summed over the live processes: the cluster's concurrency limit and calls in flight
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "llm_concurrency_limit", "Adaptive LLM concurrency limit", ["model"], multiprocess_mode="livesum")
+LLM_IN_FLIGHT = Gauge(
+    "llm_in_flight", "LLM calls in flight", ["model"], multiprocess_mode="livesum")
+CACHE_REQUESTS = Counter(
+    "cache_requests", "Cache lookups by cache and result (hit, miss, error)", ["cache", "result"])
+ERRORS = Counter(
+    "pipeline_errors", "Failed pipeline work by stage and exception type", ["stage", "error_type"])
+ADMISSION_REQUESTS = Counter(
+    "admission_requests", "Submissions by admission outcome (admitted, admitted_premium, admitted_unchecked, "
+    "rejected_rate_limit, rejected_queue_depth)", ["result"])
+ANALYSES_FLUSHED = Counter(
+    "write_behind_flushed_analyses", "Analyses written to the database by the write-behind flusher")
+
+# Set when /metrics is scraped; the most recent value of any API process wins
+QUEUE_DEPTH = Gauge(
+    "pipeline_queue_depth", "Messages waiting in each pipeline queue", ["queue"], multiprocess_mode="mostrecent")
+
+
+def page_range(pages: int) -> str:
+    # Page counts as a bounded label: 1, 2-3, 4-7, 8-15, 16-31, 32+
+    if pages <= 1:
+        return "1"
+    low = 1 << (pages.bit_length() - 1)
+    return f"{low}-{2 * low - 1}" if low < 32 else "32+"
+
+
+def count_error(stage: str, error: BaseException) -> None:
+    ERRORS.labels(stage, type(error).__name__).inc()
+
+
+def get_registry() -> CollectorRegistry:
+    # Registry to serve: this process's metrics, or the sum over all processes
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def latest() -> Tuple[bytes, str]:
+    # Exposition of the current samples and its content type
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter(port: int = settings.WORKER_METRICS_PORT) -> None:
+    # HTTP exporter of a Celery worker, run in the main worker process
+    if port <= 0:
+        return
+    try:
+        start_http_server(port, registry=get_registry())
+    except OSError as e:
+        # e.g. several workers on one host sharing the default port
+        print(f"Warning: could not start the metrics exporter on port {port}: {str(e)}")
+
+
+def mark_process_dead(pid: int) -> None:
+    # Drop the live gauges of an exited process from the shared samples
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
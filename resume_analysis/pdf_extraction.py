@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz
+
+from resume_analysis import settings
+from resume_analysis.metrics import TEXT_EXTRACTION_SECONDS, page_range
+
+# Page-sharded PDF text extraction. Kept free of heavy imports because pool
+# workers import this module to run _extract_pdf_pages.
+
+_pdf_pool = None
+_pdf_pool_pid = None
+# Process in which the pool could not be used; it extracts in a single process from then on
+_pdf_pool_unavailable_pid = None
+
+
+def _get_pdf_pool():
+    # Process pool for page-sharded extraction, created lazily once per process.
+    # forkserver keeps children independent of the threads of the calling process.
+    global _pdf_pool, _pdf_pool_pid
+    if _pdf_pool is None or _pdf_pool_pid != os.getpid():
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pdf_pool = ProcessPoolExecutor(max_workers=settings.PDF_EXTRACT_WORKERS,
+                                        mp_context=multiprocessing.get_context(method))
+        _pdf_pool_pid = os.getpid()
+    return _pdf_pool
+
+
+def _can_shard():
+    # Daemonic processes (Celery prefork children) may not have children; large
+    # documents are sharded by workers of the extract queue run with -P threads
+    global _pdf_pool_unavailable_pid
+    if _pdf_pool_unavailable_pid == os.getpid():
+        return False
+    if multiprocessing.current_process().daemon:
+        print("Warning: parallel PDF extraction unavailable in a prefork worker process, "
+              "run the extract queue with -P threads to shard large documents")
+        _pdf_pool_unavailable_pid = os.getpid()
+        return False
+    return True
+
+
+def _pdf_pool_failed(error):
+    # Drop the pool; a crashed one is replaced on the next large document, a process
+    # that can't start children at all stops trying
+    global _pdf_pool, _pdf_pool_unavailable_pid
+    print(f"Warning: parallel PDF extraction unavailable, falling back to a single process: {str(error)}")
+    if _pdf_pool is not None and _pdf_pool_pid == os.getpid():
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+    _pdf_pool = None
+    if not isinstance(error, BrokenProcessPool):
+        _pdf_pool_unavailable_pid = os.getpid()
+
+
+def _extract_pdf_pages(pdf_path, start, stop):
+    # Runs in a pool process, which opens its own fitz document
+    with fitz.open(pdf_path) as doc:
+        return [doc[number].get_text() for number in range(start, stop)]
+
+
+def extract_pdf_text(pdf_path):
+    # Blocking extraction; small documents stay in this process, large ones are page-sharded
+    started = time.perf_counter()
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+        if page_count < settings.PDF_PARALLEL_MIN_PAGES or not _can_shard():
+            pages = [page.get_text() for page in doc]
+        else:
+            pages = None
+
+    if pages is None:
+        # Large document, split the pages into contiguous shards, one per pool worker
+        shard_size = -(-page_count // settings.PDF_EXTRACT_WORKERS)
+        try:
+            pool = _get_pdf_pool()
+            futures = [pool.submit(_extract_pdf_pages, pdf_path, start, min(start + shard_size, page_count))
+                       for start in range(0, page_count, shard_size)]
+            pages = [text for future in futures for text in future.result()]
+        except (BrokenProcessPool, AssertionError, OSError) as e:
+            _pdf_pool_failed(e)
+            pages = _extract_pdf_pages(pdf_path, 0, page_count)
+
+    # Join in page order in a single pass instead of repeated string concatenation.
+    # Pages are separated by form feeds so prompt compaction can find per-page headers/footers.
+    text = "\f".join(f"{text}\n" for text in pages)
+    TEXT_EXTRACTION_SECONDS.labels("pdf", page_range(page_count)).observe(time.perf_counter() - started)
+    return text
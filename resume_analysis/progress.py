@@ -0,0 +1,107 @@
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from resume_analysis import settings
+from resume_analysis.serialization import dumps, loads
+
+# Per-task progress events over Redis. Every event is appended to a per-task log
+# (so clients that connect late can replay it) and published on a per-task channel
+# (so connected clients get it as soon as the stage finishes).
+TERMINAL_STAGES = ("completed", "failed")
+
+_redis = None
+_async_redis = None
+
+
+def _channel(task_id: str) -> str:
+    return f"task-progress:{task_id}"
+
+
+def _log_key(task_id: str) -> str:
+    return f"task-progress-log:{task_id}"
+
+
+def _seq_key(task_id: str) -> str:
+    return f"task-progress-seq:{task_id}"
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+def get_async_redis():
+    global _async_redis
+    if _async_redis is None:
+        import redis.asyncio
+        _async_redis = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return _async_redis
+
+
+def publish_progress(task_id: str, stage: str, **data: Any) -> None:
+    # Publish a stage transition. Progress reporting must never fail the task itself.
+    if not task_id:
+        return
+    try:
+        client = get_redis()
+        event = {"task_id": task_id, "stage": stage, "seq": client.incr(_seq_key(task_id)),
+                 "timestamp": time.time(), **data}
+        payload = dumps(event)
+        pipe = client.pipeline()
+        pipe.expire(_seq_key(task_id), settings.PROGRESS_TTL)
+        pipe.rpush(_log_key(task_id), payload)
+        pipe.expire(_log_key(task_id), settings.PROGRESS_TTL)
+        pipe.publish(_channel(task_id), payload)
+        pipe.execute()
+    except Exception as e:
+        print(f"Warning: could not publish progress for task {task_id}: {str(e)}")
+
+
+async def stream_progress(task_id: str, timeout: float = settings.PROGRESS_STREAM_TIMEOUT,
+                          heartbeat: float = settings.PROGRESS_HEARTBEAT) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    # Yield the events of a task in order, replaying the ones already published, until
+    # a terminal event arrives or the timeout expires. Yields None every `heartbeat`
+    # seconds without events so callers can keep the connection alive.
+    client = get_async_redis()
+    pubsub = client.pubsub()
+    # Subscribe before reading the log so no event falls between the two
+    await pubsub.subscribe(_channel(task_id))
+    try:
+        last_seq = 0
+        for payload in await client.lrange(_log_key(task_id), 0, -1):
+            event = loads(payload)
+            last_seq = event["seq"]
+            yield event
+            if event["stage"] in TERMINAL_STAGES:
+                return
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                               timeout=max(0.0, min(heartbeat, deadline - time.monotonic())))
+            if message is None:
+                yield None
+                continue
+            event = loads(message["data"])
+            if event["seq"] <= last_seq:
+                continue
+            last_seq = event["seq"]
+            yield event
+            if event["stage"] in TERMINAL_STAGES:
+                return
+    finally:
+        await pubsub.unsubscribe(_channel(task_id))
+        await pubsub.aclose()
+
+
+async def has_progress(task_id: str) -> bool:
+    return bool(await get_async_redis().exists(_log_key(task_id)))
+
+
+async def last_event(task_id: str) -> Optional[Dict[str, Any]]:
+    # Latest event recorded for a task, None when it has none
+    payload = await get_async_redis().lindex(_log_key(task_id), -1)
+    return loads(payload) if payload else None
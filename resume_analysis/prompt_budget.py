@@ -0,0 +1,171 @@
+import re
+import threading
+from collections import Counter
+from typing import List, Optional
+
+from resume_analysis import settings
+
+# Prompt compaction: extracted resume text and pasted job descriptions carry page
+# break noise, per-page headers/footers and boilerplate. Fields are cleaned and then
+# held to a token budget before they are embedded in a prompt.
+
+TRUNCATION_STRATEGIES = ("head", "tail", "middle")
+TRUNCATION_MARKER = "\n[...]\n"
+# Rough characters per token, only used when the tokenizer can't be loaded
+CHARS_PER_TOKEN = 4
+
+# "Page 2", "Page 2 of 5", "Page 2/5", "2 of 5". A bare number only counts as a page
+# number when it is the page's own number, so dates ("06/19") and figures ("100") stay.
+_PAGE_LABEL_RE = re.compile(r"^(page\s*\d{1,3}(\s*(of|/)\s*\d{1,3})?|\d{1,3}\s+of\s+\d{1,3})$", re.IGNORECASE)
+_BARE_NUMBER_RE = re.compile(r"^\d{1,3}$")
+_INLINE_SPACE_RE = re.compile(r"[ \t\u00a0\u200b]+")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    # tiktoken encoding of the configured model, None when it can't be loaded
+    # (e.g. no network to fetch the BPE file), in which case counts are estimated
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+                if settings.TOKENIZER_ENCODING:
+                    _encoding = tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+                else:
+                    try:
+                        _encoding = tiktoken.encoding_for_model(settings.LLM_MODEL_NAME)
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                print(f"Warning: tokenizer unavailable, estimating token counts: {str(e)}")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _clean_lines(text: str) -> List[str]:
+    return [_INLINE_SPACE_RE.sub(" ", line).strip() for line in text.replace("\r", "\n").split("\n")]
+
+
+def normalize_whitespace(text: str) -> str:
+    # Collapse runs of spaces inside lines and runs of blank lines; page breaks
+    # (form feeds) become blank lines
+    compacted: List[str] = []
+    for line in _clean_lines(text.replace("\f", "\n")):
+        if line or (compacted and compacted[-1]):
+            compacted.append(line)
+    return "\n".join(compacted).strip()
+
+
+def _is_page_number(line: str, page_number: int) -> bool:
+    if _PAGE_LABEL_RE.match(line):
+        return True
+    return _BARE_NUMBER_RE.match(line) is not None and int(line) == page_number
+
+
+def strip_page_furniture(text: str, edge_lines: int = settings.PROMPT_PAGE_EDGE_LINES) -> str:
+    # Remove page numbers and the headers/footers repeated at the top or bottom of
+    # most pages (pages are separated by form feeds, as in extracted PDF text). Only
+    # lines within edge_lines of a page edge are considered, and a header/footer must
+    # repeat exactly: lines that merely look alike ("2016 - 2018", "2019 - 2021") are
+    # content. A repeated header is kept once, it usually holds the candidate's name.
+    pages = [[line for line in _clean_lines(page) if line] for page in text.split("\f")]
+    pages = [page for page in pages if page]
+
+    def at_edge(position: int, page: List[str]) -> bool:
+        return position < edge_lines or position >= len(page) - edge_lines
+
+    pages = [[line for position, line in enumerate(page)
+              if not (at_edge(position, page) and _is_page_number(line, number))]
+             for number, page in enumerate(pages, start=1)]
+
+    furniture = set()
+    if len(pages) >= 2:
+        edges = Counter()
+        for page in pages:
+            edges.update({line for position, line in enumerate(page) if at_edge(position, page)})
+        threshold = max(2, -(-len(pages) // 2))
+        furniture = {line for line, count in edges.items() if count >= threshold}
+
+    seen = set()
+    kept: List[str] = []
+    for page in pages:
+        for position, line in enumerate(page):
+            if at_edge(position, page) and line in furniture:
+                if line in seen:
+                    continue
+                seen.add(line)
+            kept.append(line)
+        kept.append("")
+    return normalize_whitespace("\n".join(kept))
+
+
+def dedupe_lines(text: str, min_chars: int = settings.PROMPT_DEDUPE_MIN_CHARS) -> str:
+    # Keep only the first occurrence of long duplicated lines (pasted boilerplate,
+    # repeated disclaimers). Short lines that repeat (a date, a location, a skill) are
+    # content and stay.
+    seen = set()
+    kept: List[str] = []
+    for line in text.split("\n"):
+        if len(line) >= min_chars:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def truncate_tokens(text: str, budget: int, strategy: str = "head") -> str:
+    # Hold text to `budget` tokens: "head" keeps the start, "tail" the end and "middle"
+    # both ends around a marker. A budget of 0 or less disables truncation.
+    if strategy not in TRUNCATION_STRATEGIES:
+        raise ValueError(f"Unknown truncation strategy {strategy!r}, expected one of {TRUNCATION_STRATEGIES}")
+    if budget <= 0:
+        return text
+
+    encoding = get_encoding()
+    if encoding is None:
+        units = text
+        limit = budget * CHARS_PER_TOKEN
+
+        def decode(part):
+            return part
+    else:
+        units = encoding.encode(text, disallowed_special=())
+        limit = budget
+        decode = encoding.decode
+
+    if len(units) <= limit:
+        return text
+    if strategy == "head":
+        return decode(units[:limit]) + TRUNCATION_MARKER.rstrip()
+    if strategy == "tail":
+        return TRUNCATION_MARKER.lstrip() + decode(units[-limit:])
+    head = limit // 2
+    return decode(units[:head]) + TRUNCATION_MARKER + decode(units[len(units) - (limit - head):])
+
+
+def compact_field(text: Optional[str], budget: int, strategy: str) -> str:
+    # Clean a prompt field and hold it to its token budget
+    if not text or not settings.PROMPT_COMPACTION_ENABLED:
+        return text or ""
+    return truncate_tokens(dedupe_lines(strip_page_furniture(text)), budget, strategy)
+
+
+def compact_resume(text: Optional[str]) -> str:
+    return compact_field(text, settings.PROMPT_RESUME_TOKEN_BUDGET, settings.PROMPT_RESUME_TRUNCATION)
+
+
+def compact_job_description(text: Optional[str]) -> str:
+    return compact_field(text, settings.PROMPT_JOB_DESCRIPTION_TOKEN_BUDGET, settings.PROMPT_JOB_DESCRIPTION_TRUNCATION)
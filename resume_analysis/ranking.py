@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from resume_analysis.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+# Bulk candidate ranking: many resumes against one job description. The job
+# description's technical terms are parsed once and become the columns of a sparse
+# resume x term matrix; scores and missing keywords for the whole batch come out of
+# a few vectorized operations on it.
+
+
+class CandidateRanker:
+
+    def __init__(self, matcher: Optional[KeywordMatcher] = None):
+        self.matcher = matcher if matcher is not None else get_keyword_matcher()
+
+    def job_terms(self, job_description: str) -> List[str]:
+        return sorted(self.matcher.automaton.find_in_text(job_description))
+
+    def term_matrix(self, resume_texts: Sequence[str], terms: Sequence[str]) -> csr_matrix:
+        # Binary CSR matrix, entry (i, j) set when resume i mentions term j
+        column = {term: index for index, term in enumerate(terms)}
+        rows: List[int] = []
+        cols: List[int] = []
+        for row, text in enumerate(resume_texts):
+            for keyword in self.matcher.automaton.find_in_text(text or ""):
+                col = column.get(keyword)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        return csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                          shape=(len(resume_texts), len(terms)))
+
+    def rank(self, resume_texts: Sequence[str], job_description: str) -> List[Dict[str, Any]]:
+        # Score every resume, best first (ties keep upload order). Each result has the
+        # same fields as KeywordMatcher.score plus the resume's position in the input.
+        terms = self.job_terms(job_description)
+        matrix = self.term_matrix(resume_texts, terms)
+
+        matched = np.asarray(matrix.sum(axis=1)).ravel()
+        if terms:
+            # rint rounds half to even, like round() in KeywordMatcher.score
+            scores = np.rint(100 * matched / len(terms)).astype(int)
+        else:
+            scores = np.zeros(len(resume_texts), dtype=int)
+        missing_mask = matrix.toarray() == 0
+        has_missing = missing_mask.any(axis=1)
+        # High Match Exception, same rule as KeywordMatcher.score
+        high_match = (scores >= self.matcher.high_match_score) | ~has_missing
+        expected = np.where(high_match, scores, 100)
+
+        term_array = np.array(terms, dtype=object)
+        order = np.lexsort((np.arange(len(resume_texts)), -scores))
+        return [
+            {
+                "index": int(row),
+                "rank": rank,
+                "current_score": int(scores[row]),
+                "expected_score": int(expected[row]),
+                "missing_keywords": [] if high_match[row] else term_array[missing_mask[row]].tolist()
+            }
+            for rank, row in enumerate(order, start=1)
+        ]
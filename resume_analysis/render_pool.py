@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from resume_analysis import settings
+
+# Pool of long-lived render processes. WeasyPrint's first render in a process pays
+# for font discovery, fontconfig and CSS setup; each pool process pays it once at
+# start-up by rendering a sample resume, then serves every later render warm.
+
+# Exercises every section of the template so all font faces get loaded
+WARM_UP_RESUME = {
+    "basicDetails": {"name": "Warm Up", "position": "Engineer", "email": "warm@example.com",
+                     "linkedin": "", "location": "", "phone": ""},
+    "summary": "Warm-up render.",
+    "experience": [{"company": "Company", "position": "Role", "location": "", "startDate": "2020",
+                    "endDate": "2021", "description": "First\nSecond"}],
+    "education": [{"institution": "University", "degree": "Degree", "location": "", "startDate": "2016",
+                   "endDate": "2020"}],
+    "skills": ["Python"],
+    "certifications": [{"title": "Certification", "description": ""}],
+    "projects": [{"title": "Project", "description": "Description"}]
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+# Process in which the pool could not start processes; it renders inline from then on
+_unavailable_pid: Optional[int] = None
+
+
+def _warm_up() -> None:
+    # Pool process initializer
+    from resume_analysis.renderer import get_renderer
+    try:
+        get_renderer().render_pdf(WARM_UP_RESUME)
+    except Exception as e:
+        print(f"Warning: render process warm-up failed: {str(e)}")
+
+
+def _render(resume_data: Dict[str, Any], formatted: bool) -> bytes:
+    from resume_analysis.renderer import get_renderer
+    if not formatted:
+        from resume_analysis.document_process import format_resume_data
+        resume_data = format_resume_data(resume_data)
+    return get_renderer().render_pdf(resume_data)
+
+
+def _use_pool() -> bool:
+    # Daemonic processes (Celery prefork children) may not have children, they render
+    # inline with the warm renderer of the process itself; render workers run with
+    # -P threads so their renders go to the pool
+    return (settings.RENDER_POOL_WORKERS > 0 and not multiprocessing.current_process().daemon
+            and _unavailable_pid != os.getpid())
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    # The render pool of this process, or None when rendering runs inline
+    global _pool, _pool_pid
+    if not _use_pool():
+        return None
+    if _pool is None or _pool_pid != os.getpid():
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=settings.RENDER_POOL_WORKERS,
+                                    mp_context=multiprocessing.get_context(method),
+                                    initializer=_warm_up)
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def start_render_pool() -> None:
+    # Start every pool process now so warm-up happens before the first task. Without
+    # a pool, the process that renders inline is warmed up instead.
+    if settings.RENDER_POOL_WORKERS <= 0:
+        return
+    try:
+        pool = get_render_pool()
+        if pool is not None:
+            for future in [pool.submit(os.getpid) for _ in range(settings.RENDER_POOL_WORKERS)]:
+                future.result()
+            return
+    except (BrokenProcessPool, AssertionError, OSError) as e:
+        _pool_unavailable(e)
+    _warm_up()
+
+
+def shutdown_render_pool() -> None:
+    # Also used to drop a broken pool, the next render starts a fresh one
+    global _pool
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+def _pool_unavailable(error: Exception) -> None:
+    # A crashed pool is replaced on the next render; a process that can't start
+    # children at all (e.g. daemonic) stops trying and renders inline
+    global _unavailable_pid
+    print(f"Warning: render pool unavailable, rendering inline: {str(error)}")
+    shutdown_render_pool()
+    if not isinstance(error, BrokenProcessPool):
+        _unavailable_pid = os.getpid()
+
+
+def submit(resume_data: Dict[str, Any], formatted: bool = False) -> Future:
+    # Render structured resume data (or already formatted template data) to PDF bytes,
+    # inline when the pool is disabled or can't be used
+    try:
+        pool = get_render_pool()
+        if pool is not None:
+            return pool.submit(_render, resume_data, formatted)
+    except (BrokenProcessPool, AssertionError, OSError) as e:
+        _pool_unavailable(e)
+    future: Future = Future()
+    try:
+        future.set_result(_render(resume_data, formatted))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def render_pdf(resume_data: Dict[str, Any], formatted: bool = False) -> bytes:
+    return submit(resume_data, formatted).result()
+
+
+async def render_pdf_async(resume_data: Dict[str, Any], formatted: bool = False) -> bytes:
+    return await asyncio.wrap_future(submit(resume_data, formatted))
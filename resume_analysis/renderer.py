@@ -0,0 +1,48 @@
+import os
+from typing import Any, Dict, Optional
+
+from jinja2 import Environment, FileSystemLoader
+from weasyprint import CSS, HTML
+
+from resume_analysis import settings
+from resume_analysis.assets import get_asset_fetcher
+from resume_analysis.metrics import RENDER_SECONDS
+
+RESUME_TEMPLATE = "resume/resume.html"
+PAGE_CSS = "@page { size: A4; margin: 5mm; }"
+
+
+class ResumeRenderer:
+    # Renders formatted resume data to PDF bytes entirely in memory. The Jinja
+    # environment, the compiled template and the parsed stylesheets are built once
+    # and reused for every render in the process.
+
+    def __init__(self, template_dir: str = settings.TEMPLATE_DIR, template_name: str = RESUME_TEMPLATE):
+        # Same autoescaping as fastapi's Jinja2Templates
+        self.env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
+        self.template = self.env.get_template(template_name)
+        # Relative URLs in the template resolve against its own directory
+        self.base_url = os.path.dirname(os.path.abspath(os.path.join(template_dir, template_name))) + os.sep
+        self.stylesheets = [CSS(string=PAGE_CSS)]
+        # Remote assets come from the local asset cache, never from the network by default
+        self.url_fetcher = get_asset_fetcher()
+
+    def render_html(self, formatted_data: Dict[str, Any]) -> str:
+        return self.template.render(resume=formatted_data)
+
+    def render_pdf(self, formatted_data: Dict[str, Any]) -> bytes:
+        with RENDER_SECONDS.labels("html").time():
+            html_content = self.render_html(formatted_data)
+        with RENDER_SECONDS.labels("pdf").time():
+            return HTML(string=html_content, base_url=self.base_url,
+                        url_fetcher=self.url_fetcher).write_pdf(stylesheets=self.stylesheets)
+
+
+_renderer: Optional[ResumeRenderer] = None
+
+
+def get_renderer() -> ResumeRenderer:
+    global _renderer
+    if _renderer is None:
+        _renderer = ResumeRenderer()
+    return _renderer
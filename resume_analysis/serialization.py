@@ -0,0 +1,68 @@
+import threading
+from typing import Any
+
+import orjson
+import zstandard
+
+from resume_analysis import settings
+
+# orjson everywhere results are encoded: API responses, progress events, the database
+# JSON column and Celery messages/results. Celery payloads larger than
+# SERIALIZER_COMPRESSION_THRESHOLD bytes are zstd-compressed; a zstd frame can't be
+# mistaken for JSON (it starts with 0x28 0xB5 0x2F 0xFD), so decoding needs no flag.
+
+ORJSON_SERIALIZER = "orjson"
+CELERY_CONTENT_TYPE = "application/x-orjson"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# zstd contexts aren't safe to share between threads
+_zstd = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    if not hasattr(_zstd, "compressor"):
+        _zstd.compressor = zstandard.ZstdCompressor(level=settings.SERIALIZER_COMPRESSION_LEVEL)
+    return _zstd.compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    if not hasattr(_zstd, "decompressor"):
+        _zstd.decompressor = zstandard.ZstdDecompressor()
+    return _zstd.decompressor
+
+
+def dumps(obj: Any) -> bytes:
+    # Types orjson doesn't know (Decimal, exceptions, ...) are encoded as strings,
+    # like json.dumps(..., default=str)
+    return orjson.dumps(obj, default=str, option=_OPTIONS)
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+loads = orjson.loads
+
+
+def encode_message(obj: Any) -> bytes:
+    payload = dumps(obj)
+    threshold = settings.SERIALIZER_COMPRESSION_THRESHOLD
+    if threshold > 0 and len(payload) >= threshold:
+        return _compressor().compress(payload)
+    return payload
+
+
+def decode_message(payload) -> Any:
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    if payload[:4] == _ZSTD_MAGIC:
+        payload = _decompressor().decompress(payload)
+    return orjson.loads(payload)
+
+
+def register_celery_serializer() -> None:
+    # Make "orjson" available to task_serializer / result_serializer
+    from kombu.serialization import register
+    register(ORJSON_SERIALIZER, encode_message, decode_message,
+             content_type=CELERY_CONTENT_TYPE, content_encoding="binary")
@@ -0,0 +1,198 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables so every setting below can come from .env
+load_dotenv()
+
+# Shared Redis (Celery broker/result backend and caches)
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+# Celery message and result encoding, "orjson" (see resume_analysis/serialization.py) or "json".
+# Payloads of at least SERIALIZER_COMPRESSION_THRESHOLD bytes are zstd-compressed, 0 disables.
+CELERY_SERIALIZER = os.environ.get("CELERY_SERIALIZER", "orjson")
+# A structure -> render message (resume text plus structured resume) is 4-8 KB and zstd
+# saves 60-67% of it; messages under 2 KB save at most 40% (benchmarks/serialization_benchmark.py).
+SERIALIZER_COMPRESSION_THRESHOLD = int(os.environ.get("SERIALIZER_COMPRESSION_THRESHOLD", str(2 * 1024)))
+SERIALIZER_COMPRESSION_LEVEL = int(os.environ.get("SERIALIZER_COMPRESSION_LEVEL", "3"))
+
+# Celery queues of the pipeline stages
+EXTRACT_QUEUE = os.environ.get("EXTRACT_QUEUE", "extract")
+LLM_QUEUE = os.environ.get("LLM_QUEUE", "llm")
+RENDER_QUEUE = os.environ.get("RENDER_QUEUE", "render")
+
+# Batch analysis (one resume against many job descriptions)
+BATCH_MAX_JOB_DESCRIPTIONS = int(os.environ.get("BATCH_MAX_JOB_DESCRIPTIONS", "50"))
+# Maximum analysis tasks of one batch running at the same time
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+
+# Bulk candidate ranking (many resumes against one job description)
+RANKING_MAX_RESUMES = int(os.environ.get("RANKING_MAX_RESUMES", "500"))
+# Resumes extracted per extraction task
+RANKING_EXTRACT_CHUNK_SIZE = int(os.environ.get("RANKING_EXTRACT_CHUNK_SIZE", "25"))
+# Upper limit for the number of top candidates escalated to the LLM analysis
+RANKING_MAX_TOP_K = int(os.environ.get("RANKING_MAX_TOP_K", "20"))
+
+# LLM response cache
+# Backend can be "redis", "sqlite", "memory" or "none"
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "redis")
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_SQLITE_PATH = os.environ.get("LLM_CACHE_SQLITE_PATH", "./llm_cache.db")
+
+# Default chat model used by ResumeAnalyzer
+LLM_MODEL_NAME = os.environ.get("LLM_MODEL_NAME", "gpt-4o-mini")
+LLM_MODEL_PROVIDER = os.environ.get("LLM_MODEL_PROVIDER", "openai")
+
+# Connection pool shared by the chat model clients of each process
+LLM_POOL_MAX_CONNECTIONS = int(os.environ.get("LLM_POOL_MAX_CONNECTIONS", "20"))
+LLM_POOL_MAX_KEEPALIVE = int(os.environ.get("LLM_POOL_MAX_KEEPALIVE", "10"))
+LLM_POOL_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "120"))
+
+# Local keyword matcher run before the LLM keyword analysis
+KEYWORD_MATCH_ENABLED = os.environ.get("KEYWORD_MATCH_ENABLED", "true").lower() == "true"
+# Score at which no missing keywords are reported (same rule as the LLM prompt)
+KEYWORD_MATCH_HIGH_SCORE = int(os.environ.get("KEYWORD_MATCH_HIGH_SCORE", "85"))
+# Local score at which the LLM call is skipped entirely
+KEYWORD_MATCH_ACCEPT_SCORE = int(os.environ.get("KEYWORD_MATCH_ACCEPT_SCORE", "90"))
+# Minimum recognised job description keywords before the local score is trusted
+KEYWORD_MATCH_MIN_KEYWORDS = int(os.environ.get("KEYWORD_MATCH_MIN_KEYWORDS", "5"))
+
+# "sync" runs blocking LLM calls in the task thread (prefork or gevent pools),
+# "async" runs them on a shared per-process event loop (threads pool)
+ANALYZER_EXECUTION_MODE = os.environ.get("ANALYZER_EXECUTION_MODE", "sync")
+# Maximum in-flight LLM requests per process in async mode
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "32"))
+
+# Cluster-wide LLM scheduler (see resume_analysis/llm_scheduler.py). Provider limits per
+# model, shared by every worker through Redis token buckets (0 disables a bucket);
+# HEADROOM keeps throughput just under them and BURST_SECONDS bounds a burst.
+LLM_SCHEDULER_ENABLED = os.environ.get("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+LLM_RPM_LIMIT = int(os.environ.get("LLM_RPM_LIMIT", "0"))
+LLM_TPM_LIMIT = int(os.environ.get("LLM_TPM_LIMIT", "0"))
+LLM_RATE_HEADROOM = float(os.environ.get("LLM_RATE_HEADROOM", "0.9"))
+LLM_RATE_BURST_SECONDS = float(os.environ.get("LLM_RATE_BURST_SECONDS", "5"))
+# Output tokens reserved per call until the provider reports the actual count
+LLM_OUTPUT_TOKENS_ESTIMATE = int(os.environ.get("LLM_OUTPUT_TOKENS_ESTIMATE", "1000"))
+# Adaptive concurrency per process, between LLM_MIN_CONCURRENCY and LLM_MAX_CONCURRENCY:
+# halved on a 429, reduced when a call takes longer than LLM_LATENCY_TARGET seconds
+# (0 disables), grown by one per window of successful calls otherwise
+LLM_MIN_CONCURRENCY = int(os.environ.get("LLM_MIN_CONCURRENCY", "1"))
+LLM_LATENCY_TARGET = float(os.environ.get("LLM_LATENCY_TARGET", "60"))
+# Retries of rate limited, timed out and 5xx calls, with jittered exponential backoff
+# (a Retry-After from the provider takes precedence)
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "1"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "60"))
+# "single" writes the structured resume in one LLM call, "sections" extracts a skeleton
+# first and then writes the sections with concurrent calls
+RESUME_GENERATION_MODE = os.environ.get("RESUME_GENERATION_MODE", "single")
+
+# Prompt compaction and token budgets (0 disables a budget). Truncation strategies:
+# "head" keeps the start, "tail" the end, "middle" both ends.
+PROMPT_COMPACTION_ENABLED = os.environ.get("PROMPT_COMPACTION_ENABLED", "true").lower() == "true"
+PROMPT_RESUME_TOKEN_BUDGET = int(os.environ.get("PROMPT_RESUME_TOKEN_BUDGET", "6000"))
+PROMPT_RESUME_TRUNCATION = os.environ.get("PROMPT_RESUME_TRUNCATION", "middle")
+PROMPT_JOB_DESCRIPTION_TOKEN_BUDGET = int(os.environ.get("PROMPT_JOB_DESCRIPTION_TOKEN_BUDGET", "3000"))
+PROMPT_JOB_DESCRIPTION_TRUNCATION = os.environ.get("PROMPT_JOB_DESCRIPTION_TRUNCATION", "head")
+# Lines at the top and bottom of each page that are checked for repeated headers/footers
+PROMPT_PAGE_EDGE_LINES = int(os.environ.get("PROMPT_PAGE_EDGE_LINES", "3"))
+# Duplicated lines at least this long are treated as boilerplate and kept once
+PROMPT_DEDUPE_MIN_CHARS = int(os.environ.get("PROMPT_DEDUPE_MIN_CHARS", "40"))
+# tiktoken encoding name, empty to use the encoding of LLM_MODEL_NAME
+TOKENIZER_ENCODING = os.environ.get("TOKENIZER_ENCODING", "")
+
+# Resume analysis database (SQLite)
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "./resume_analysis.db")
+# Log every SQL statement
+DATABASE_ECHO = os.environ.get("DATABASE_ECHO", "false").lower() == "true"
+DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", "10"))
+# Milliseconds a connection waits on a locked database before failing
+DATABASE_BUSY_TIMEOUT = int(os.environ.get("DATABASE_BUSY_TIMEOUT", "5000"))
+# Page cache per connection in KiB, and bytes of the file memory-mapped for reads
+DATABASE_CACHE_SIZE_KB = int(os.environ.get("DATABASE_CACHE_SIZE_KB", str(64 * 1024)))
+DATABASE_MMAP_SIZE = int(os.environ.get("DATABASE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# zstd level of the stored resume and job description text
+DATABASE_COMPRESSION_LEVEL = int(os.environ.get("DATABASE_COMPRESSION_LEVEL", "3"))
+# Analyses older than this many days are pruned by the beat schedule, 0 keeps them all
+ANALYSIS_RETENTION_DAYS = int(os.environ.get("ANALYSIS_RETENTION_DAYS", "30"))
+# Rows deleted per transaction while pruning, so writers aren't locked out for long
+ANALYSIS_PRUNE_BATCH_SIZE = int(os.environ.get("ANALYSIS_PRUNE_BATCH_SIZE", "1000"))
+# "sync" saves each analysis in its own transaction, "write_behind" appends it to a
+# Redis stream that a flusher bulk-inserts in batches (see resume_analysis/write_behind.py)
+ANALYSIS_PERSISTENCE_MODE = os.environ.get("ANALYSIS_PERSISTENCE_MODE", "sync")
+# A batch is written once it has WRITE_BEHIND_BATCH_SIZE analyses or its first one has
+# waited WRITE_BEHIND_MAX_LATENCY seconds
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "200"))
+WRITE_BEHIND_MAX_LATENCY = float(os.environ.get("WRITE_BEHIND_MAX_LATENCY", "1.0"))
+# Run a flusher thread in every Celery worker; disable to run `python -m resume_analysis.write_behind` instead
+WRITE_BEHIND_FLUSHER = os.environ.get("WRITE_BEHIND_FLUSHER", "true").lower() == "true"
+# Seconds before entries read by a flusher that died are taken over by another one
+WRITE_BEHIND_CLAIM_IDLE = int(os.environ.get("WRITE_BEHIND_CLAIM_IDLE", "60"))
+
+# Uploads
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "uploads")
+# Uploads still referenced after this many seconds are treated as leaked and removed
+UPLOAD_STALE_AFTER = int(os.environ.get("UPLOAD_STALE_AFTER", "86400"))
+
+# Cache of text extracted from uploads, keyed by content hash
+# Backend can be "redis", "sqlite", "memory" or "none"
+TEXT_CACHE_BACKEND = os.environ.get("TEXT_CACHE_BACKEND", "redis")
+TEXT_CACHE_TTL = int(os.environ.get("TEXT_CACHE_TTL", str(7 * 86400)))
+TEXT_CACHE_MAX_ENTRIES = int(os.environ.get("TEXT_CACHE_MAX_ENTRIES", "5000"))
+TEXT_CACHE_SQLITE_PATH = os.environ.get("TEXT_CACHE_SQLITE_PATH", "./text_cache.db")
+
+# PDF text extraction
+# Documents with at least this many pages are split across a process pool
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Resume rendering
+TEMPLATE_DIR = os.environ.get("TEMPLATE_DIR", "templates")
+PDF_DIR = os.environ.get("PDF_DIR", "generated_pdfs")
+# Local copies of remote template assets (fonts, stylesheets), see resume_analysis/assets.py
+ASSET_DIR = os.environ.get("ASSET_DIR", os.path.join(TEMPLATE_DIR, "assets"))
+# Download an asset missing from the local cache into it the first time a render needs
+# it (e.g. the template's web fonts on a fresh deployment), then serve it locally
+ASSET_CACHE_MISSING = os.environ.get("ASSET_CACHE_MISSING", "true").lower() == "true"
+# Fetch assets that can't be cached over the network on every render instead of skipping them
+ASSET_ALLOW_EXTERNAL = os.environ.get("ASSET_ALLOW_EXTERNAL", "false").lower() == "true"
+# Pre-warmed render processes per worker process, 0 renders inline
+RENDER_POOL_WORKERS = int(os.environ.get("RENDER_POOL_WORKERS", "1"))
+
+# Task progress events (Redis pub/sub)
+PROGRESS_TTL = int(os.environ.get("PROGRESS_TTL", "3600"))
+PROGRESS_STREAM_TIMEOUT = float(os.environ.get("PROGRESS_STREAM_TIMEOUT", "600"))
+PROGRESS_HEARTBEAT = float(os.environ.get("PROGRESS_HEARTBEAT", "15"))
+
+# Request coalescing: identical submissions from one client (same upload, job description
+# and endpoint, or the same Idempotency-Key header) get the task_id of the first one while
+# its pipeline runs, and for IDEMPOTENCY_TTL seconds after it completed. That defaults to
+# the Celery result expiry, so a duplicate never gets an expired handle. The claim itself
+# lasts at most IDEMPOTENCY_CLAIM_TTL seconds, the progress log lifetime by default.
+IDEMPOTENCY_ENABLED = os.environ.get("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "300"))
+IDEMPOTENCY_CLAIM_TTL = int(os.environ.get("IDEMPOTENCY_CLAIM_TTL", str(PROGRESS_TTL)))
+
+# Admission control for the submission endpoints: requests are refused with 429 and a
+# Retry-After header while the pipeline queues hold more than ADMISSION_MAX_QUEUE_DEPTH
+# messages, or when the client is out of its token bucket (RATE_LIMIT_PER_MINUTE
+# sustained, RATE_LIMIT_BURST at once; 0 disables). Clients are identified by their
+# X-API-Key header, or their address without one.
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_QUEUE_DEPTH = int(os.environ.get("ADMISSION_MAX_QUEUE_DEPTH", "200"))
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "30"))
+RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", "30"))
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "10"))
+# Comma-separated API keys of premium tenants: not held back by the queue depth limit,
+# and their pipelines are queued ahead of everyone else's
+PREMIUM_API_KEYS = {key.strip() for key in os.environ.get("PREMIUM_API_KEYS", "").split(",") if key.strip()}
+
+# Prometheus metrics (see resume_analysis/metrics.py): the API serves them on /metrics,
+# every Celery worker on WORKER_METRICS_PORT (0 disables). Prefork children and the
+# render/extraction pool processes keep their own samples; PROMETHEUS_MULTIPROC_DIR
+# (read by prometheus_client) aggregates them.
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "9540"))
@@ -0,0 +1,318 @@
+# Technical skills, tools, platforms and certifications recognised by the local
+# keyword matcher. Keys are the display names returned as missing keywords,
+# values are extra spellings that count as the same skill. Matching is
+# case-insensitive and folds singular/plural forms, so only list real variants.
+# Ambiguous English words (e.g. "go", "rest", "spring") are only listed in an
+# unambiguous form.
+SKILLS_TAXONOMY = {
+    # Programming languages
+    "Python": [],
+    "Java": [],
+    "JavaScript": ["js", "ecmascript", "es6"],
+    "TypeScript": [],
+    "C++": ["cpp"],
+    "C#": ["csharp", "c sharp"],
+    "Golang": ["go lang", "go programming"],
+    "Rust": [],
+    "Ruby": [],
+    "PHP": [],
+    "Kotlin": [],
+    "Swift": [],
+    "Objective-C": ["objective c", "objc"],
+    "Scala": [],
+    "Perl": [],
+    "Bash": ["shell scripting", "shell script"],
+    "PowerShell": [],
+    "MATLAB": [],
+    "Dart": [],
+    "Elixir": [],
+    "Haskell": [],
+    "Lua": [],
+    "Solidity": [],
+    "SQL": [],
+    "PL/SQL": ["plsql"],
+    "T-SQL": ["tsql"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Sass": ["scss"],
+    "VBA": [],
+    "COBOL": [],
+    "Fortran": [],
+    "Assembly Language": [],
+
+    # Frontend
+    "React": ["react.js", "reactjs"],
+    "React Native": [],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vue", "vuejs"],
+    "Next.js": ["nextjs"],
+    "Nuxt.js": ["nuxt"],
+    "Svelte": [],
+    "Redux": [],
+    "jQuery": [],
+    "Tailwind CSS": ["tailwind"],
+    "Bootstrap": [],
+    "Webpack": [],
+    "Vite": [],
+    "Flutter": [],
+    "GraphQL": [],
+    "Storybook": [],
+
+    # Backend frameworks
+    "Node.js": ["nodejs"],
+    "Express.js": ["expressjs"],
+    "NestJS": ["nest.js"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": [],
+    "Spring Boot": ["springboot", "spring framework"],
+    "Hibernate": [],
+    ".NET": ["dotnet", ".net core", "asp.net", "asp.net core"],
+    "Ruby on Rails": ["rails"],
+    "Laravel": [],
+    "Symfony": [],
+    "Celery": [],
+    "gRPC": [],
+    "REST API": ["restful", "restful api", "rest apis"],
+    "SOAP": [],
+    "Microservices": ["microservice architecture"],
+    "WebSockets": ["websocket"],
+
+    # Data stores
+    "PostgreSQL": ["postgres"],
+    "MySQL": [],
+    "MariaDB": [],
+    "SQLite": [],
+    "Oracle Database": ["oracle db", "oracle"],
+    "Microsoft SQL Server": ["sql server", "mssql"],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Cassandra": [],
+    "DynamoDB": [],
+    "Elasticsearch": ["elastic search", "opensearch"],
+    "Neo4j": [],
+    "Couchbase": [],
+    "Firebase": ["firestore"],
+    "Snowflake": [],
+    "BigQuery": [],
+    "Redshift": [],
+    "Databricks": [],
+    "ClickHouse": [],
+    "InfluxDB": [],
+    "Memcached": [],
+
+    # Data engineering and analytics
+    "Apache Spark": ["spark", "pyspark"],
+    "Apache Kafka": ["kafka"],
+    "Apache Airflow": ["airflow"],
+    "Apache Hadoop": ["hadoop", "hdfs"],
+    "Apache Flink": ["flink"],
+    "Apache Beam": [],
+    "Hive": [],
+    "dbt": [],
+    "ETL": ["elt", "etl pipeline"],
+    "Data Warehousing": ["data warehouse"],
+    "Data Modeling": ["data modelling"],
+    "Pandas": [],
+    "NumPy": [],
+    "SciPy": [],
+    "Tableau": [],
+    "Power BI": ["powerbi"],
+    "Looker": [],
+    "Excel": ["microsoft excel", "ms excel"],
+    "RabbitMQ": [],
+    "ActiveMQ": [],
+
+    # Machine learning and AI
+    "Machine Learning": ["ml"],
+    "Deep Learning": [],
+    "Artificial Intelligence": ["ai"],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": [],
+    "Generative AI": ["genai", "gen ai"],
+    "Large Language Models": ["llm", "llms"],
+    "Retrieval-Augmented Generation": ["rag"],
+    "Prompt Engineering": [],
+    "TensorFlow": [],
+    "PyTorch": [],
+    "Keras": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "XGBoost": [],
+    "LightGBM": [],
+    "Hugging Face": ["huggingface", "transformers"],
+    "LangChain": [],
+    "OpenAI API": ["openai"],
+    "MLflow": [],
+    "Kubeflow": [],
+    "MLOps": [],
+    "OpenCV": [],
+    "Reinforcement Learning": [],
+    "Statistics": ["statistical analysis"],
+    "A/B Testing": ["ab testing", "a/b test"],
+
+    # Cloud
+    "AWS": ["amazon web services"],
+    "Microsoft Azure": ["azure"],
+    "Google Cloud Platform": ["gcp", "google cloud"],
+    "AWS Lambda": ["lambda"],
+    "Amazon EC2": ["ec2"],
+    "Amazon S3": ["s3"],
+    "Amazon RDS": ["rds"],
+    "Amazon ECS": ["ecs"],
+    "Amazon EKS": ["eks"],
+    "Amazon SQS": ["sqs"],
+    "AWS CloudFormation": ["cloudformation"],
+    "Azure DevOps": [],
+    "Azure Functions": [],
+    "Google Kubernetes Engine": ["gke"],
+    "Serverless": [],
+    "Heroku": [],
+    "Vercel": [],
+    "DigitalOcean": [],
+    "OpenStack": [],
+
+    # DevOps and infrastructure
+    "Docker": [],
+    "Kubernetes": ["k8s"],
+    "Helm": [],
+    "Terraform": [],
+    "Ansible": [],
+    "Puppet": [],
+    "Chef": [],
+    "Jenkins": [],
+    "GitHub Actions": [],
+    "GitLab CI": ["gitlab ci/cd"],
+    "CircleCI": [],
+    "Travis CI": [],
+    "ArgoCD": ["argo cd"],
+    "CI/CD": ["continuous integration", "continuous delivery", "continuous deployment"],
+    "Infrastructure as Code": ["iac"],
+    "Linux": ["unix"],
+    "Nginx": [],
+    "Apache HTTP Server": ["apache httpd"],
+    "Prometheus": [],
+    "Grafana": [],
+    "Datadog": [],
+    "New Relic": [],
+    "Splunk": [],
+    "ELK Stack": ["elk", "logstash", "kibana"],
+    "OpenTelemetry": [],
+    "Istio": [],
+    "Vagrant": [],
+    "Git": [],
+    "GitHub": [],
+    "GitLab": [],
+    "Bitbucket": [],
+    "SVN": ["subversion"],
+    "Site Reliability Engineering": ["sre"],
+    "DevOps": [],
+
+    # Testing
+    "Unit Testing": ["unit test"],
+    "Test-Driven Development": ["tdd"],
+    "Behavior-Driven Development": ["bdd"],
+    "Selenium": [],
+    "Cypress": [],
+    "Playwright": [],
+    "Jest": [],
+    "Mocha": [],
+    "PyTest": [],
+    "JUnit": [],
+    "TestNG": [],
+    "Postman": [],
+    "JMeter": [],
+    "Cucumber": [],
+
+    # Security and networking
+    "Cybersecurity": ["cyber security", "information security", "infosec"],
+    "Penetration Testing": ["pen testing", "pentesting"],
+    "OAuth": ["oauth2", "oauth 2.0"],
+    "OpenID Connect": ["oidc"],
+    "JWT": ["json web token"],
+    "SAML": [],
+    "Single Sign-On": ["sso"],
+    "IAM": ["identity and access management"],
+    "SIEM": [],
+    "OWASP": [],
+    "Encryption": [],
+    "TCP/IP": [],
+    "DNS": [],
+    "VPN": [],
+    "Firewalls": ["firewall"],
+    "Zero Trust": [],
+
+    # Mobile and embedded
+    "Android": [],
+    "iOS": [],
+    "SwiftUI": [],
+    "Xamarin": [],
+    "Embedded Systems": ["embedded software"],
+    "RTOS": [],
+    "Arduino": [],
+    "Raspberry Pi": [],
+    "FPGA": [],
+    "Verilog": [],
+    "VHDL": [],
+
+    # Enterprise and business platforms
+    "SAP": [],
+    "Salesforce": [],
+    "ServiceNow": [],
+    "Workday": [],
+    "Oracle E-Business Suite": ["oracle ebs"],
+    "Microsoft Dynamics": ["dynamics 365"],
+    "SharePoint": [],
+    "Jira": [],
+    "Confluence": [],
+    "Trello": [],
+    "Asana": [],
+    "Figma": [],
+    "Sketch": [],
+    "Adobe XD": [],
+    "Adobe Photoshop": ["photoshop"],
+    "Adobe Illustrator": ["illustrator"],
+    "HubSpot": [],
+    "Google Analytics": [],
+    "SEO": ["search engine optimization"],
+    "Shopify": [],
+    "WordPress": [],
+
+    # Methodologies and architecture
+    "Agile": [],
+    "Scrum": [],
+    "Kanban": [],
+    "SDLC": ["software development life cycle"],
+    "Object-Oriented Programming": ["oop", "object oriented programming"],
+    "Functional Programming": [],
+    "Design Patterns": [],
+    "System Design": [],
+    "Distributed Systems": [],
+    "Event-Driven Architecture": ["event driven architecture"],
+    "Domain-Driven Design": ["ddd"],
+    "Data Structures": [],
+    "Algorithms": [],
+    "Multithreading": ["concurrency"],
+    "Blockchain": [],
+    "Web3": [],
+
+    # Certifications
+    "AWS Certified Solutions Architect": [],
+    "AWS Certified Developer": [],
+    "Azure Administrator": ["az-104"],
+    "Google Cloud Professional": [],
+    "Certified Kubernetes Administrator": ["cka"],
+    "CISSP": [],
+    "CISM": [],
+    "CISA": [],
+    "CompTIA Security+": ["security+"],
+    "CEH": ["certified ethical hacker"],
+    "PMP": ["project management professional"],
+    "PRINCE2": [],
+    "Certified ScrumMaster": ["csm", "scrum master"],
+    "ITIL": [],
+    "Six Sigma": ["lean six sigma"],
+    "CCNA": [],
+    "CCNP": [],
+    "CPA": [],
+    "CFA": [],
+}
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+# Sections whose entries are forwarded one by one as soon as each entry is complete
+LIST_SECTIONS = ("Work Experience", "Education", "Projects", "Certifications")
+
+
+class SectionStream:
+    # Turns the partial JSON objects produced while a structured resume streams in
+    # into completed sections. JSON is generated in order, so a top-level section is
+    # complete once the next one has started, and a list entry is complete once the
+    # next entry has started. Iterating yields events like
+    #   {"section": "Professional Summary", "data": "..."}
+    #   {"section": "Work Experience", "index": 0, "data": {...}}
+    # and `result` holds the final object once the stream is exhausted.
+
+    def __init__(self, partials: Iterable[Optional[Dict[str, Any]]]):
+        self.partials = partials
+        self.result: Optional[Dict[str, Any]] = None
+        self._emitted_sections = set()
+        self._emitted_items: Dict[str, int] = {}
+
+    def _list_items(self, section: str, items: Any, complete: bool) -> Iterator[Dict[str, Any]]:
+        if not isinstance(items, list):
+            return
+        done = len(items) if complete else len(items) - 1
+        start = self._emitted_items.get(section, 0)
+        for index in range(start, done):
+            yield {"section": section, "index": index, "data": items[index]}
+        self._emitted_items[section] = max(start, done)
+
+    def _sections(self, partial: Dict[str, Any], final: bool) -> Iterator[Dict[str, Any]]:
+        keys = list(partial.keys())
+        for position, section in enumerate(keys):
+            if section in self._emitted_sections:
+                continue
+            complete = final or position < len(keys) - 1
+            if section in LIST_SECTIONS:
+                yield from self._list_items(section, partial[section], complete)
+            elif complete:
+                yield {"section": section, "data": partial[section]}
+            if complete:
+                self._emitted_sections.add(section)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        latest = None
+        for partial in self.partials:
+            if not isinstance(partial, dict):
+                continue
+            latest = partial
+            yield from self._sections(partial, final=False)
+        self.result = latest
+        if latest is not None:
+            yield from self._sections(latest, final=True)
@@ -1,152 +1,590 @@
-from celery import Celery
 import os
-from resume_analysis.database import save_resume_analysis_sync, SaveResumeAnalysis
-from typing import Dict
+from celery import Celery, chain, chord
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
+from celery.utils import uuid
+from resume_analysis.database import SaveResumeAnalysis, init_db, prune_resume_analyses
+from resume_analysis.metrics import ANALYZER_SECONDS, count_error, mark_process_dead, start_worker_exporter
+from resume_analysis.progress import publish_progress
+from resume_analysis.serialization import register_celery_serializer
+from resume_analysis.settings import (REDIS_URL, KEYWORD_MATCH_ENABLED, ANALYZER_EXECUTION_MODE, UPLOAD_STALE_AFTER,
+                                      EXTRACT_QUEUE, LLM_QUEUE, RENDER_QUEUE, BATCH_CONCURRENCY,
+                                      RANKING_EXTRACT_CHUNK_SIZE, ANALYSIS_RETENTION_DAYS,
+                                      ANALYSIS_PERSISTENCE_MODE, WRITE_BEHIND_FLUSHER, CELERY_SERIALIZER)
+from resume_analysis.upload_store import get_upload_store
+from resume_analysis.write_behind import store_analysis
+from typing import Dict, List, Optional, Tuple
 
 
-celery_app = Celery('tasks', broker='redis://localhost:6379/0', backend='redis://localhost:6379/0', result_expires=300)
+celery_app = Celery('tasks', broker=REDIS_URL, backend=REDIS_URL, result_expires=300)
 
-@celery_app.task(name='tasks.full_resume_analysis')
-def full_resume_analysis(resume_file_path: str, job_description: str):
-    from resume_analysis.langchain_test import ResumeAnalyzer
-    from resume_analysis.document_process import extract_text_from_pdf, extract_text_from_word
+# Messages and results in the configured encoding; both encodings stay accepted, so
+# switching CELERY_SERIALIZER doesn't strand messages already queued
+register_celery_serializer()
+celery_app.conf.task_serializer = CELERY_SERIALIZER
+celery_app.conf.result_serializer = CELERY_SERIALIZER
+celery_app.conf.accept_content = ["orjson", "json"]
+celery_app.conf.result_accept_content = ["orjson", "json"]
+
+# Each pipeline stage has its own queue, so CPU-bound workers (threads feeding the
+# extraction and render process pools) and LLM workers (high-concurrency
+# async/gevent) scale independently
+celery_app.conf.task_routes = {
+    "tasks.extract_text": {"queue": EXTRACT_QUEUE},
+    "tasks.analyze_keywords": {"queue": LLM_QUEUE},
+    "tasks.analyze_postings": {"queue": LLM_QUEUE},
+    "tasks.structure_resume": {"queue": LLM_QUEUE},
+    "tasks.render_resume": {"queue": RENDER_QUEUE},
+    "tasks.extract_resumes": {"queue": EXTRACT_QUEUE},
+    "tasks.rank_candidates": {"queue": EXTRACT_QUEUE},
+    "tasks.analyze_candidate": {"queue": LLM_QUEUE},
+}
+
+# Message priorities. The Redis transport keeps one list per priority step for every
+# queue and polls them priority-first across all of a worker's queues, so premium
+# pipelines skip the backlog of standard ones. The queues themselves stay round-robin:
+# a backlog on one queue must not starve the others of a multi-queue worker. Tasks
+# queued by a task (chain stages, chord members) keep its priority.
+PRIORITY_STEPS = [0, 3, 6, 9]
+PRIORITY_SEP = ":"
+PREMIUM_PRIORITY = 0
+STANDARD_PRIORITY = 6
+
+celery_app.conf.broker_transport_options = {
+    "priority_steps": PRIORITY_STEPS,
+    "sep": PRIORITY_SEP,
+}
+celery_app.conf.task_default_priority = STANDARD_PRIORITY
+celery_app.conf.task_inherit_parent_priority = True
+# Reserve one message per worker slot, so prefetched standard work doesn't sit ahead
+# of premium messages queued after it
+celery_app.conf.worker_prefetch_multiplier = 1
+
+
+def queue_keys(queue: str) -> List[str]:
+    # Redis lists holding the messages of a queue, one per priority step
+    return [queue] + [f"{queue}{PRIORITY_SEP}{step}" for step in PRIORITY_STEPS[1:]]
+
+# Periodic jobs, run with `celery -A resume_analysis.tasks beat`
+celery_app.conf.beat_schedule = {
+    "collect-upload-garbage": {
+        "task": "tasks.collect_upload_garbage",
+        "schedule": 3600.0,
+    },
+    "prune-resume-analyses": {
+        "task": "tasks.prune_resume_analyses",
+        "schedule": 86400.0,
+    },
+}
+
+# One analyzer per worker process, sharing the pooled chat model clients
+_analyzer = None
+
+
+def get_analyzer():
+    global _analyzer
+    if _analyzer is None:
+        from resume_analysis.langchain_test import ResumeAnalyzer
+        _analyzer = ResumeAnalyzer()
+    return _analyzer
+
+
+def run_analyzer(method: str, *args, **kwargs):
+    # Run a ResumeAnalyzer method in the configured execution mode. In async mode the
+    # call is awaited on the shared event loop of this process, so every task thread
+    # of a "threads" pool worker multiplexes its LLM request over the same loop.
+    analyzer = get_analyzer()
+    with ANALYZER_SECONDS.labels(method).time():
+        if ANALYZER_EXECUTION_MODE == "async":
+            from resume_analysis.async_runtime import run_coroutine
+            return run_coroutine(getattr(analyzer, f"a{method}")(*args, **kwargs))
+        return getattr(analyzer, method)(*args, **kwargs)
+
+
+def stream_analyzer(task_id: str, method: str, *args, **kwargs):
+    # Run a streaming ResumeAnalyzer method, publishing a "section" progress event for
+    # every resume section (and every list entry) as soon as it has fully parsed.
+    # Returns the complete structured resume.
+    from resume_analysis.streaming import SectionStream
+
+    sections = SectionStream(getattr(get_analyzer(), f"stream_{method}")(*args, **kwargs))
+    with ANALYZER_SECONDS.labels(f"stream_{method}").time():
+        for section in sections:
+            publish_progress(task_id, "section", **section)
+    if sections.result is None:
+        raise ValueError("The model returned no structured resume data")
+    return sections.result
+
+
+@worker_init.connect
+def init_worker(sender=None, **kwargs):
+    # Create the database schema once, before prefork children open connections
+    try:
+        init_db()
+    except Exception as e:
+        print(f"Warning: could not initialize the database: {str(e)}")
+
+    # Serves the samples of this worker (and, in multiprocess mode, of its children)
+    start_worker_exporter()
+
+    # Threads/gevent pools have no child processes, so warm up the worker process itself
+    pool = getattr(sender, "pool_cls", None)
+    if "prefork" not in str(getattr(pool, "__module__", pool)):
+        init_worker_process()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # Pay imports and client construction once per worker process instead of per task
+    from resume_analysis.llm_clients import init_clients
+    import resume_analysis.document_process  # noqa: F401
+    from resume_analysis.keyword_matcher import get_keyword_matcher
+
+    if KEYWORD_MATCH_ENABLED:
+        get_keyword_matcher()
+
+    analyzer = get_analyzer()
+    init_clients([(analyzer.model_name, analyzer.model_provider)])
+
+    if ANALYZER_EXECUTION_MODE == "async":
+        from resume_analysis.async_runtime import get_loop
+        get_loop()
+
+    # Start the pre-warmed render processes (or warm up this process when it can't
+    # have children) before the first task needs them
+    from resume_analysis.render_pool import start_render_pool
+    try:
+        start_render_pool()
+    except Exception as e:
+        print(f"Warning: could not start render pool: {str(e)}")
+
+
+@worker_ready.connect
+def start_worker_flusher(**kwargs):
+    # One write-behind flusher per worker node, started once the pool has forked
+    if ANALYSIS_PERSISTENCE_MODE == "write_behind" and WRITE_BEHIND_FLUSHER:
+        from resume_analysis.write_behind import start_flusher
+        start_flusher()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    from resume_analysis.llm_clients import close_clients
+    from resume_analysis.render_pool import shutdown_render_pool
+    from resume_analysis import async_runtime
+    from resume_analysis.write_behind import stop_flusher
+    close_clients()
+    shutdown_render_pool()
+    async_runtime.shutdown()
+    stop_flusher()
+    mark_process_dead(os.getpid())
+
+
+def analyze_resume(resume_text: str, job_description: str) -> Dict:
+    # Score locally first, only resumes that don't clearly match need the LLM
+    candidate_keywords = None
+    if KEYWORD_MATCH_ENABLED:
+        from resume_analysis.keyword_matcher import get_keyword_matcher
+        decided, local_result = get_keyword_matcher().prescreen(resume_text, job_description)
+        if decided:
+            return local_result
+        candidate_keywords = local_result["missing_keywords"]
+
+    # Perform analysis
+    return run_analyzer("get_missing_keywords", resume_text, job_description,
+                        candidate_keywords=candidate_keywords)
+
+
+def _is_error(payload) -> bool:
+    return isinstance(payload, dict) and payload.get("status") == "error"
+
+
+def _stage_failed(pipeline_id: str, stage: str, e: Exception) -> Dict:
+    # A failed stage returns error information instead of raising, so the following
+    # stages pass it through and the pipeline's result handle still completes
+    count_error(stage, e)
+    response = {
+        "status": "error",
+        "error_type": type(e).__name__,
+        "error_message": str(e)
+    }
+    publish_progress(pipeline_id, "failed", result=response)
+    return response
+
+
+# Pipeline stages. Every stage receives the previous stage's result and runs on the
+# queue of its resource: extraction and rendering are CPU-bound, structured
+# generation and analysis wait on the LLM. Progress is published under the pipeline
+# id, which is also the task id of the last stage.
+
+@celery_app.task(name='tasks.extract_text')
+def extract_text(resume_file_path: str, pipeline_id: str):
+    from resume_analysis.document_process import extract_text_from_file
     import asyncio
-    
-    # Extract text from file based on extension
+
     try:
-        file_extension = os.path.splitext(resume_file_path)[1].lower()
-        
-        # Create an async function to call the async extraction functions
-        async def extract_text():
-            if file_extension == ".pdf":
-                return await extract_text_from_pdf(resume_file_path)
-            elif file_extension in [".docx", ".doc"]:
-                return await extract_text_from_word(resume_file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_extension}")
-        
-        # Run the async function in a new event loop
-        resume_text = asyncio.run(extract_text())
-        
-        # Perform analysis
-        analyzer = ResumeAnalyzer()
-        result = analyzer.get_missing_keywords(resume_text, job_description)
-        
-
-        # Create a SaveResumeAnalysis Pydantic object
+        # Cached by content hash, so a reused resume skips extraction entirely
+        resume_text = asyncio.run(extract_text_from_file(resume_file_path))
+        publish_progress(pipeline_id, "extracted")
+        return {"pipeline_id": pipeline_id, "resume_text": resume_text}
+    except Exception as e:
+        return _stage_failed(pipeline_id, "extract", e)
+    finally:
+        # Release this pipeline's reference, the store deletes the file once it is unused
+        try:
+            get_upload_store().release(resume_file_path)
+        except Exception as cleanup_error:
+            print(f"Error releasing uploaded file {resume_file_path}: {str(cleanup_error)}")
+
+
+@celery_app.task(name='tasks.analyze_keywords')
+def analyze_keywords(extracted: Dict, job_description: str):
+    if _is_error(extracted):
+        return extracted
+    pipeline_id = extracted["pipeline_id"]
+    resume_text = extracted["resume_text"]
+
+    try:
+        result = analyze_resume(resume_text, job_description)
+        publish_progress(pipeline_id, "analyzed")
+
+        # Saved under the pipeline id, which clients pass to /generate-resume
         resume_data = SaveResumeAnalysis(
-            task_id=full_resume_analysis.request.id,
+            task_id=pipeline_id,
             resume_text=resume_text,
             job_description=job_description,
             analysis_results=result
         )
+        store_analysis(resume_data)
 
-        # Pass the object to the sync function
-        save_resume_analysis_sync(resume_data)
-            
-        return {
+        response = {
             "analysis": result,
-            "task_id": full_resume_analysis.request.id
+            "task_id": pipeline_id
         }
-        
+        publish_progress(pipeline_id, "completed", result=response)
+        return response
     except Exception as e:
-        # Return error information
-        return {
-            "status": "error",
-            "error_type": type(e).__name__,
-            "error_message": str(e)
-        }
-    finally:
-        # Clean up the file after processing
-        try:
-            if os.path.exists(resume_file_path):
-                os.remove(resume_file_path)
-        except Exception as cleanup_error:
-            print(f"Error removing temporary file {resume_file_path}: {str(cleanup_error)}")
-        
-@celery_app.task(name='tasks.generate_resume')
-def generate_resume(analysis_dict: Dict):
-    # Import here to avoid circular imports
-    from resume_analysis.langchain_test import ResumeAnalyzer
+        return _stage_failed(pipeline_id, "analyze", e)
+
+
+@celery_app.task(name='tasks.structure_resume')
+def structure_resume(extracted: Dict, method: str, stream_sections: bool = False, **kwargs):
+    # Structured resume generation with a ResumeAnalyzer method, from the extracted text
+    if _is_error(extracted):
+        return extracted
+    pipeline_id = extracted["pipeline_id"]
+
+    try:
+        kwargs["resume_data"] = extracted["resume_text"]
+        # Streaming forwards each section to progress listeners while the model writes it
+        if stream_sections:
+            result = stream_analyzer(pipeline_id, method, **kwargs)
+        else:
+            result = run_analyzer(method, **kwargs)
+        publish_progress(pipeline_id, "structured")
+        return {"pipeline_id": pipeline_id, "resume_data": result}
+    except Exception as e:
+        return _stage_failed(pipeline_id, "structure", e)
+
+
+@celery_app.task(name='tasks.render_resume')
+def render_resume(structured: Dict):
     from resume_analysis.document_process import generate_resume_from_json
     import asyncio
-    
-    analyzer = ResumeAnalyzer()
-    result = analyzer.get_structured_resume_data(resume_data=analysis_dict["resume_text"],
-        missing_keywords_data=analysis_dict["analysis_results"],
-        job_description=analysis_dict["job_description"])
-    
-    pdf_result = asyncio.run(generate_resume_from_json(result))
-    
+
+    if _is_error(structured):
+        return structured
+    pipeline_id = structured["pipeline_id"]
+    result = structured["resume_data"]
+
+    try:
+        pdf_result = asyncio.run(generate_resume_from_json(result))
+    except Exception as e:
+        return _stage_failed(pipeline_id, "render", e)
+
     if pdf_result:
-        return {
+        response = {
             "pdf": {
                 "filename": pdf_result["filename"],
                 "pdf_path": pdf_result["pdf_path"],
                 "download_url": pdf_result["download_url"]
             }
         }
+        publish_progress(pipeline_id, "rendered")
+        publish_progress(pipeline_id, "completed", result=response)
     else:
-        return {
+        response = {
             "status": "error",
             "result": result,
             "error_message": "Failed to generate PDF resume"
         }
+        publish_progress(pipeline_id, "failed", result=response)
+    return response
+
+
+@celery_app.task(name='tasks.analyze_batch')
+def analyze_batch(extracted: Dict, job_descriptions: List[str], pipeline_id: str):
+    # Fan the analyses of one extracted resume out over at most BATCH_CONCURRENCY
+    # tasks, then rank the results in a chord callback carrying the pipeline id
+    rank = rank_batch.s(pipeline_id).set(task_id=pipeline_id)
+    if _is_error(extracted):
+        rank.apply_async(([extracted],))
+        return extracted
+
+    postings = list(enumerate(job_descriptions))
+    chunk_size = -(-len(postings) // BATCH_CONCURRENCY)
+    chord(
+        analyze_postings.s(extracted["resume_text"], postings[start:start + chunk_size], pipeline_id)
+        for start in range(0, len(postings), chunk_size)
+    )(rank)
+    return {"pipeline_id": pipeline_id, "postings": len(postings)}
+
+
+@celery_app.task(name='tasks.analyze_postings')
+def analyze_postings(resume_text: str, postings: List, pipeline_id: str):
+    # One chunk of a batch: analyze the resume against each (index, job description)
+    results = []
+    for index, job_description in postings:
+        try:
+            result = analyze_resume(resume_text, job_description)
+            # Each posting's analysis is saved, so /generate-resume works with its analysis_id
+            analysis_id = f"{pipeline_id}-{index}"
+            store_analysis(SaveResumeAnalysis(
+                task_id=analysis_id,
+                resume_text=resume_text,
+                job_description=job_description,
+                analysis_results=result
+            ))
+            publish_progress(pipeline_id, "analyzed", index=index, analysis_id=analysis_id,
+                             current_score=result.get("current_score"))
+            results.append({"index": index, "analysis_id": analysis_id, "analysis": result})
+        except Exception as e:
+            count_error("analyze", e)
+            results.append({"index": index, "status": "error", "error_type": type(e).__name__,
+                            "error_message": str(e)})
+    return results
+
+
+@celery_app.task(name='tasks.rank_batch')
+def rank_batch(chunks: List, pipeline_id: str):
+    # Chord callback: postings ranked by current_score, failed postings listed apart
+    if len(chunks) == 1 and _is_error(chunks[0]):
+        # Extraction failed, it already published the failure
+        return chunks[0]
+    results = [result for chunk in chunks for result in chunk]
+    ranked = sorted((r for r in results if not _is_error(r)),
+                    key=lambda r: (-(r["analysis"].get("current_score") or 0), r["index"]))
+    response = {
+        "task_id": pipeline_id,
+        "results": ranked,
+        "failed": [r for r in results if _is_error(r)]
+    }
+    publish_progress(pipeline_id, "completed", result=response)
+    return response
 
 
-@celery_app.task(name='tasks.generate_resume_with_keyword')
-def generate_resume_with_keyword(resume_file_path: str, missing_keywords: str):
-    from resume_analysis.langchain_test import ResumeAnalyzer
-    from resume_analysis.document_process import extract_text_from_pdf, extract_text_from_word, generate_resume_from_json
+@celery_app.task(name='tasks.extract_resumes')
+def extract_resumes(files: List, pipeline_id: str):
+    # One chunk of a ranking batch: [(index, path)] -> [(index, text, error)]
+    from resume_analysis.document_process import extract_text_from_file
     import asyncio
 
-    # Extract text from file based on extension
+    async def extract_all():
+        return await asyncio.gather(*(extract_text_from_file(path) for _, path in files), return_exceptions=True)
+
     try:
-        file_extension = os.path.splitext(resume_file_path)[1].lower()
-        
-        # Create an async function to call the async extraction functions
-        async def extract_text():
-            if file_extension == ".pdf":
-                return await extract_text_from_pdf(resume_file_path)
-            elif file_extension in [".docx", ".doc"]:
-                return await extract_text_from_word(resume_file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_extension}")
-        
-        # Run the async function in a new event loop
-        resume_text = asyncio.run(extract_text())
-        
-        # Perform analysis
-        analyzer = ResumeAnalyzer()
-        result = analyzer.get_structured_resume_from_keywords(resume_text, missing_keywords)
+        texts = asyncio.run(extract_all())
+    finally:
+        for _, path in files:
+            try:
+                get_upload_store().release(path)
+            except Exception as cleanup_error:
+                print(f"Error releasing uploaded file {path}: {str(cleanup_error)}")
 
-        pdf_result = asyncio.run(generate_resume_from_json(result))
-    
-        if pdf_result:
-            return {
-                "pdf": {
-                    "filename": pdf_result["filename"],
-                    "pdf_path": pdf_result["pdf_path"],
-                    "download_url": pdf_result["download_url"]
-                }
-            }
+    extracted = []
+    for (index, _), text in zip(files, texts):
+        if isinstance(text, Exception):
+            count_error("extract", text)
+            extracted.append([index, None, f"{type(text).__name__}: {str(text)}"])
         else:
-            return {
-                "status": "error",
-                "result": result,
-                "error_message": "Failed to generate PDF resume"
-            }
+            extracted.append([index, text, None])
+    publish_progress(pipeline_id, "extracted", resumes=len(files))
+    return extracted
+
+
+@celery_app.task(name='tasks.rank_candidates')
+def rank_candidates(chunks: List, job_description: str, filenames: List[str], top_k: int, pipeline_id: str):
+    # Chord callback of the extraction chunks: rank every resume locally in one pass,
+    # publish the ranking, then escalate the top-K candidates to the LLM analysis
+    from resume_analysis.ranking import CandidateRanker
+
+    entries = sorted((entry for chunk in chunks for entry in chunk), key=lambda entry: entry[0])
+    failed = [{"index": index, "filename": filenames[index], "status": "error", "error_message": error}
+              for index, _, error in entries if error is not None]
+    candidates = [(index, text) for index, text, error in entries if error is None]
+
+    try:
+        ranked = CandidateRanker().rank([text for _, text in candidates], job_description)
     except Exception as e:
-        # Return error information
-        return {
-            "status": "error",
-            "error_type": type(e).__name__,
-            "error_message": str(e)
-        }
-    finally:
-        # Clean up the file after processing
-        try:
-            if os.path.exists(resume_file_path):
-                os.remove(resume_file_path)
-        except Exception as cleanup_error:
-            print(f"Error removing temporary file {resume_file_path}: {str(cleanup_error)}")
+        count_error("rank", e)
+        # Completes the pipeline's result handle with the error
+        error = {"error_type": type(e).__name__, "error_message": str(e)}
+        finish_ranking.s([], failed, pipeline_id, error=error).set(task_id=pipeline_id).apply_async(([],))
+        raise
+    for result in ranked:
+        # Positions in the ranked subset map back to the upload order
+        result["index"] = candidates[result["index"]][0]
+        result["filename"] = filenames[result["index"]]
+    publish_progress(pipeline_id, "ranked", results=ranked, failed=failed)
+
+    texts = dict(candidates)
+    finish = finish_ranking.s(ranked, failed, pipeline_id).set(task_id=pipeline_id)
+    escalated = ranked[:max(0, top_k)]
+    if escalated:
+        chord(
+            analyze_candidate.s(result["index"], texts[result["index"]], result["missing_keywords"],
+                                job_description, pipeline_id)
+            for result in escalated
+        )(finish)
+    else:
+        finish.apply_async(([],))
+    return {"pipeline_id": pipeline_id, "ranked": len(ranked), "escalated": len(escalated)}
+
+
+@celery_app.task(name='tasks.analyze_candidate')
+def analyze_candidate(index: int, resume_text: str, candidate_keywords: List[str], job_description: str,
+                      pipeline_id: str):
+    # LLM analysis of one top-ranked candidate, seeded with its locally missing keywords
+    try:
+        result = run_analyzer("get_missing_keywords", resume_text, job_description,
+                              candidate_keywords=candidate_keywords)
+        # Saved like batch analyses, so /generate-resume works with the analysis_id
+        analysis_id = f"{pipeline_id}-{index}"
+        store_analysis(SaveResumeAnalysis(
+            task_id=analysis_id,
+            resume_text=resume_text,
+            job_description=job_description,
+            analysis_results=result
+        ))
+        publish_progress(pipeline_id, "analyzed", index=index, analysis_id=analysis_id, analysis=result)
+        return {"index": index, "analysis_id": analysis_id, "analysis": result}
+    except Exception as e:
+        count_error("analyze", e)
+        return {"index": index, "status": "error", "error_type": type(e).__name__, "error_message": str(e)}
+
+
+@celery_app.task(name='tasks.finish_ranking')
+def finish_ranking(analyses: List, ranked: List, failed: List, pipeline_id: str, error: Optional[Dict] = None):
+    # Final ranking: escalated candidates first, ordered by their LLM score, then the
+    # rest in local order
+    if error is not None:
+        response = {"status": "error", **error}
+        publish_progress(pipeline_id, "failed", result=response)
+        return response
+
+    by_index = {analysis["index"]: analysis for analysis in analyses}
+    escalated = []
+    for result in ranked[:len(analyses)]:
+        analysis = by_index.get(result["index"], {})
+        if _is_error(analysis):
+            result["llm_error"] = analysis.get("error_message")
+        else:
+            result["analysis_id"] = analysis.get("analysis_id")
+            result["analysis"] = analysis.get("analysis")
+        escalated.append(result)
+    escalated.sort(key=lambda r: -((r.get("analysis") or {}).get("current_score", r["current_score"]) or 0))
+
+    results = escalated + ranked[len(analyses):]
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+    response = {"task_id": pipeline_id, "results": results, "failed": failed}
+    publish_progress(pipeline_id, "completed", result=response)
+    return response
+
+
+# Pipelines. Each returns its pipeline id, the handle for /task-status and /task-events.
+# Callers may pick the id up front (see resume_analysis/idempotency.py) and the priority
+# of the pipeline's messages (see resume_analysis/admission.py).
+
+def _priority_options(priority: Optional[int]) -> Dict:
+    return {} if priority is None else {"priority": priority}
+
+
+def start_resume_analysis(resume_file_path: str, job_description: str,
+                          pipeline_id: Optional[str] = None, priority: Optional[int] = None) -> str:
+    # extract -> analyze
+    pipeline_id = pipeline_id or uuid()
+    chain(
+        extract_text.s(resume_file_path, pipeline_id),
+        analyze_keywords.s(job_description).set(task_id=pipeline_id)
+    ).apply_async(**_priority_options(priority))
+    return pipeline_id
+
+
+def start_batch_analysis(resume_file_path: str, job_descriptions: List[str],
+                         pipeline_id: Optional[str] = None, priority: Optional[int] = None) -> str:
+    # extract -> analyze each job description (chord) -> rank
+    pipeline_id = pipeline_id or uuid()
+    chain(
+        extract_text.s(resume_file_path, pipeline_id),
+        analyze_batch.s(job_descriptions, pipeline_id)
+    ).apply_async(**_priority_options(priority))
+    return pipeline_id
+
+
+def start_candidate_ranking(uploads: List[Tuple[str, str]], job_description: str, top_k: int = 0,
+                            pipeline_id: Optional[str] = None, priority: Optional[int] = None) -> str:
+    # extract (chunks, chord) -> rank all resumes -> LLM analysis of the top-K (chord) -> finish.
+    # uploads are (path, filename) pairs.
+    pipeline_id = pipeline_id or uuid()
+    files = [(index, path) for index, (path, _) in enumerate(uploads)]
+    filenames = [filename for _, filename in uploads]
+    chunk_size = RANKING_EXTRACT_CHUNK_SIZE
+    chord(
+        extract_resumes.s(files[start:start + chunk_size], pipeline_id).set(**_priority_options(priority))
+        for start in range(0, len(files), chunk_size)
+    )(rank_candidates.s(job_description, filenames, top_k, pipeline_id))
+    return pipeline_id
+
+
+def start_resume_generation(analysis_dict: Dict, stream_sections: bool = False,
+                            pipeline_id: Optional[str] = None, priority: Optional[int] = None) -> str:
+    # structure -> render, from a saved analysis
+    pipeline_id = pipeline_id or uuid()
+    chain(
+        structure_resume.s({"pipeline_id": pipeline_id, "resume_text": analysis_dict["resume_text"]},
+                           "get_structured_resume_data", stream_sections=stream_sections,
+                           missing_keywords_data=analysis_dict["analysis_results"],
+                           job_description=analysis_dict["job_description"]),
+        render_resume.s().set(task_id=pipeline_id)
+    ).apply_async(**_priority_options(priority))
+    return pipeline_id
+
+
+def start_resume_generation_with_keywords(resume_file_path: str, missing_keywords: str,
+                                          stream_sections: bool = False, pipeline_id: Optional[str] = None,
+                                          priority: Optional[int] = None) -> str:
+    # extract -> structure -> render
+    pipeline_id = pipeline_id or uuid()
+    chain(
+        extract_text.s(resume_file_path, pipeline_id),
+        structure_resume.s("get_structured_resume_from_keywords", stream_sections=stream_sections,
+                           missing_keywords_data=missing_keywords),
+        render_resume.s().set(task_id=pipeline_id)
+    ).apply_async(**_priority_options(priority))
+    return pipeline_id
+
+
+@celery_app.task(name='tasks.collect_upload_garbage')
+def collect_upload_garbage():
+    # Remove uploads whose references leaked, e.g. when a worker was killed mid-task
+    removed = get_upload_store().collect_garbage(UPLOAD_STALE_AFTER)
+    return {"removed": removed}
+
+
+@celery_app.task(name='tasks.prune_resume_analyses')
+def prune_analyses():
+    # Delete stored analyses past the retention period
+    if ANALYSIS_RETENTION_DAYS <= 0:
+        return {"removed": 0}
+    return {"removed": prune_resume_analyses(ANALYSIS_RETENTION_DAYS)}
@@ -0,0 +1,135 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from resume_analysis import settings
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadStore:
+    # Content-addressed store for uploaded resumes. Files live at <root>/<sha256><ext>,
+    # so the same CV uploaded against many job descriptions is stored once. A SQLite
+    # index shared by the API and the workers reference-counts every file: each
+    # queued task holds one reference and the file is deleted when the last one is
+    # released.
+
+    def __init__(self, root_dir: str, index_path: str):
+        self.root_dir = root_dir
+        self.index_path = index_path
+        self._local = threading.local()
+        os.makedirs(root_dir, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS uploads ("
+            "sha256 TEXT PRIMARY KEY, path TEXT NOT NULL, refcount INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def path_for(self, sha256: str, extension: str) -> str:
+        return os.path.join(self.root_dir, f"{sha256}{extension}")
+
+    @staticmethod
+    def content_hash(path: str) -> Optional[str]:
+        # Content hash of a store-managed path, None for any other file
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return stem if _HASH_RE.match(stem) else None
+
+    def add(self, source_path: str, sha256: str, extension: str) -> str:
+        # Move a freshly written upload into the store and take a reference on it
+        path = self.path_for(sha256, extension)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if os.path.exists(path):
+                os.remove(source_path)
+            else:
+                os.replace(source_path, path)
+            conn.execute(
+                "INSERT INTO uploads (sha256, path, refcount, last_used) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET refcount = refcount + 1, last_used = excluded.last_used",
+                (sha256, path, time.time())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return path
+
+    def release(self, path: str) -> None:
+        # Drop one reference, deleting the file once nothing refers to it
+        sha256 = self.content_hash(path)
+        if sha256 is None:
+            # Not managed by the store (e.g. queued before it existed)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE uploads SET refcount = refcount - 1, last_used = ? WHERE sha256 = ?",
+                (time.time(), sha256)
+            )
+            row = conn.execute("SELECT refcount FROM uploads WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None or row[0] <= 0:
+                conn.execute("DELETE FROM uploads WHERE sha256 = ?", (sha256,))
+                if os.path.exists(path):
+                    os.remove(path)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def collect_garbage(self, stale_after: float) -> int:
+        # Remove files whose references leaked (e.g. a worker died mid-task) and
+        # files on disk that the index doesn't know about. Returns files removed.
+        removed = 0
+        cutoff = time.time() - stale_after
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stale = conn.execute("SELECT sha256, path FROM uploads WHERE last_used < ?", (cutoff,)).fetchall()
+            for sha256, path in stale:
+                conn.execute("DELETE FROM uploads WHERE sha256 = ?", (sha256,))
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+            known = {row[0] for row in conn.execute("SELECT sha256 FROM uploads")}
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        for name in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, name)
+            if path == self.index_path or name.startswith(os.path.basename(self.index_path)):
+                continue
+            if not os.path.isfile(path) or os.path.getmtime(path) >= cutoff:
+                continue
+            if self.content_hash(path) not in known:
+                os.remove(path)
+                removed += 1
+        return removed
+
+
+_store: Optional[UploadStore] = None
+
+
+def get_upload_store() -> UploadStore:
+    global _store
+    if _store is None:
+        _store = UploadStore(settings.UPLOAD_DIR, os.path.join(settings.UPLOAD_DIR, ".index.db"))
+    return _store
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import time
+import uuid
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from resume_analysis import settings
+from resume_analysis.metrics import UPLOAD_WRITE_SECONDS
+from resume_analysis.upload_store import get_upload_store
+
+# Magic numbers of the resume formats we accept
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+class IngestedUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    extension: str
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    # Detect the file type from its first bytes instead of trusting the client's filename
+    if head.startswith(PDF_MAGIC):
+        return ".pdf"
+    if head.startswith(ZIP_MAGIC) and (b"[Content_Types].xml" in head or b"word/" in head):
+        return ".docx"
+    if head.startswith(OLE2_MAGIC):
+        return ".doc"
+    return None
+
+
+async def ingest_upload(upload: UploadFile, dest_dir: str = settings.UPLOAD_DIR,
+                        max_size: int = settings.MAX_UPLOAD_SIZE,
+                        chunk_size: int = settings.UPLOAD_CHUNK_SIZE) -> IngestedUpload:
+    # Stream an upload to disk in chunks without blocking the event loop, validating
+    # its size and type and hashing its content on the way. The returned path holds a
+    # reference in the upload store that the consuming task must release.
+    if upload.size is not None and upload.size > max_size:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {max_size} bytes.")
+
+    started = time.perf_counter()
+    partial_path = os.path.join(dest_dir, f"{uuid.uuid4().hex}.part")
+    hasher = hashlib.sha256()
+    size = 0
+    extension = None
+    buffer = await run_in_threadpool(open, partial_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            if extension is None:
+                extension = sniff_extension(chunk)
+                if extension is None:
+                    raise HTTPException(status_code=415, detail="Unsupported file type. Please upload a PDF or Word document.")
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {max_size} bytes.")
+            hasher.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        await run_in_threadpool(_remove_quietly, partial_path)
+        raise
+    await run_in_threadpool(buffer.close)
+
+    if extension is None:
+        await run_in_threadpool(_remove_quietly, partial_path)
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+
+    # Hand the file to the content-addressed store, which takes a reference for the task
+    sha256 = hasher.hexdigest()
+    file_path = await run_in_threadpool(get_upload_store().add, partial_path, sha256, extension)
+    UPLOAD_WRITE_SECONDS.labels(extension).observe(time.perf_counter() - started)
+    return IngestedUpload(path=file_path, sha256=sha256, size=size, extension=extension)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
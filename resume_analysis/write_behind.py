@@ -0,0 +1,175 @@
+import datetime
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from resume_analysis import settings
+from resume_analysis.database import (ResumeAnalysis, SaveResumeAnalysis, save_resume_analyses_bulk,
+                                      save_resume_analysis_sync)
+from resume_analysis.metrics import ANALYSES_FLUSHED
+from resume_analysis.progress import get_async_redis, get_redis
+from resume_analysis.serialization import dumps, loads
+
+# Write-behind persistence of analyses. Workers store each record in a Redis hash
+# (read through by get_resume_analysis) and append its id to a stream; a flusher
+# reads the stream through a consumer group and bulk-inserts whole batches in one
+# transaction, then acknowledges the entries and drops the records from the hash.
+# Entries read by a flusher that died are claimed by another one after a while.
+
+STREAM_KEY = "analysis-writes"
+PENDING_KEY = "analysis-pending"
+GROUP = "analysis-flushers"
+
+
+def _record(data: SaveResumeAnalysis) -> Dict[str, Any]:
+    return {
+        "id": data.task_id,
+        "resume_text": data.resume_text,
+        "job_description": data.job_description,
+        "analysis_results": data.analysis_results,
+        "timestamp": datetime.datetime.utcnow().isoformat()
+    }
+
+
+def store_analysis(data: SaveResumeAnalysis) -> None:
+    # Persist an analysis in the configured mode. If the write-behind buffer can't be
+    # reached the analysis is saved directly, it must not be lost.
+    if settings.ANALYSIS_PERSISTENCE_MODE != "write_behind":
+        save_resume_analysis_sync(data)
+        return
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hset(PENDING_KEY, data.task_id, dumps(_record(data)))
+        pipe.xadd(STREAM_KEY, {"id": data.task_id})
+        pipe.execute()
+    except Exception as e:
+        print(f"Warning: write-behind buffer unavailable, saving analysis {data.task_id} directly: {str(e)}")
+        save_resume_analysis_sync(data)
+
+
+def _to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {**record, "timestamp": datetime.datetime.fromisoformat(record["timestamp"])}
+
+
+async def get_pending_analysis(task_id: str) -> Optional[ResumeAnalysis]:
+    # An analysis still waiting to be flushed, as a detached ResumeAnalysis
+    try:
+        payload = await get_async_redis().hget(PENDING_KEY, task_id)
+    except Exception as e:
+        print(f"Warning: could not read the write-behind buffer: {str(e)}")
+        return None
+    return ResumeAnalysis(**_to_row(loads(payload))) if payload else None
+
+
+class WriteBehindFlusher:
+
+    def __init__(self, batch_size: int = settings.WRITE_BEHIND_BATCH_SIZE,
+                 max_latency: float = settings.WRITE_BEHIND_MAX_LATENCY,
+                 claim_idle: int = settings.WRITE_BEHIND_CLAIM_IDLE, consumer: Optional[str] = None):
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.claim_idle = claim_idle
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.flushed = 0
+        self.batches = 0
+
+    def ensure_group(self) -> None:
+        try:
+            get_redis().xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read_batch(self) -> List:
+        # Up to batch_size entries: first the ones abandoned by dead flushers, then new
+        # ones until the batch is full or max_latency has passed since the first read
+        client = get_redis()
+        claimed = client.xautoclaim(STREAM_KEY, GROUP, self.consumer, min_idle_time=self.claim_idle * 1000,
+                                    start_id="0-0", count=self.batch_size)[1]
+        # Entries deleted after they were read come back without fields
+        entries = [entry for entry in claimed if entry[1]]
+        deadline = time.monotonic() + self.max_latency
+        while len(entries) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            response = client.xreadgroup(GROUP, self.consumer, {STREAM_KEY: ">"},
+                                         count=self.batch_size - len(entries), block=max(1, int(remaining * 1000)))
+            if not response:
+                break
+            entries.extend(response[0][1])
+        return entries
+
+    def flush(self, entries: List) -> int:
+        # One transaction for the batch, then ack the entries and drop their records
+        if not entries:
+            return 0
+        client = get_redis()
+        entry_ids = [entry_id for entry_id, _ in entries]
+        task_ids = list(dict.fromkeys(fields[b"id"].decode() for _, fields in entries))
+        # Records already flushed by someone else are gone from the hash
+        rows = [_to_row(loads(payload)) for payload in client.hmget(PENDING_KEY, task_ids) if payload]
+        save_resume_analyses_bulk(rows)
+
+        pipe = client.pipeline()
+        pipe.xack(STREAM_KEY, GROUP, *entry_ids)
+        pipe.xdel(STREAM_KEY, *entry_ids)
+        pipe.hdel(PENDING_KEY, *task_ids)
+        pipe.execute()
+        self.flushed += len(rows)
+        ANALYSES_FLUSHED.inc(len(rows))
+        self.batches += 1
+        return len(rows)
+
+    def run(self, stop: threading.Event) -> None:
+        # Flush batches until stop is set; errors leave the entries unacknowledged, so
+        # they are retried (by this flusher or another one) once claim_idle has passed
+        group_ready = False
+        while not stop.is_set():
+            try:
+                if not group_ready:
+                    self.ensure_group()
+                    group_ready = True
+                self.flush(self.read_batch())
+            except Exception as e:
+                print(f"Warning: write-behind flush failed: {str(e)}")
+                stop.wait(1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"consumer": self.consumer, "flushed": self.flushed, "batches": self.batches}
+
+
+# Flusher thread of this process (Celery workers)
+_flusher_thread: Optional[threading.Thread] = None
+_flusher_stop = threading.Event()
+
+
+def start_flusher() -> None:
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    _flusher_stop.clear()
+    flusher = WriteBehindFlusher()
+    _flusher_thread = threading.Thread(target=flusher.run, args=(_flusher_stop,),
+                                       name="write-behind-flusher", daemon=True)
+    _flusher_thread.start()
+
+
+def stop_flusher() -> None:
+    # Let the flusher write the batch it is reading, then stop
+    global _flusher_thread
+    if _flusher_thread is None:
+        return
+    _flusher_stop.set()
+    _flusher_thread.join(timeout=settings.WRITE_BEHIND_MAX_LATENCY + 30)
+    _flusher_thread = None
+
+
+if __name__ == "__main__":
+    # python -m resume_analysis.write_behind: standalone flusher
+    try:
+        WriteBehindFlusher().run(threading.Event())
+    except KeyboardInterrupt:
+        pass
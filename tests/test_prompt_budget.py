@@ -0,0 +1,45 @@
+from resume_analysis.prompt_budget import strip_page_furniture
+
+
+def test_similar_dates_at_page_edges_are_kept():
+    text = ("Acme Corp\nEngineer\n2016 - 2018\f"
+            "2019 - 2021\nGlobex\nSenior Engineer")
+    result = strip_page_furniture(text, edge_lines=3)
+    assert "2016 - 2018" in result
+    assert "2019 - 2021" in result
+
+
+def test_standalone_dates_and_numbers_are_kept():
+    text = ("06/19\nAcme Corp\n100\f"
+            "08/21\nGlobex\n250")
+    result = strip_page_furniture(text, edge_lines=3).split("\n")
+    for line in ("06/19", "08/21", "100", "250"):
+        assert line in result
+
+
+def test_page_labels_are_removed():
+    text = ("Summary\nPage 1 of 2\f"
+            "Experience\nPage 2 of 2")
+    result = strip_page_furniture(text, edge_lines=2)
+    assert "Page" not in result
+    assert "Summary" in result and "Experience" in result
+
+
+def test_bare_page_numbers_are_removed_only_when_they_match_the_page():
+    text = ("Summary\nLed a team\n1\f"
+            "Experience\nShipped a product\n2\f"
+            "Projects\nBuilt a tool\n7")
+    result = strip_page_furniture(text, edge_lines=1).split("\n")
+    assert "1" not in result
+    assert "2" not in result
+    assert "7" in result
+
+
+def test_exactly_repeated_header_is_kept_once():
+    text = ("Jane Doe - Resume\nSummary\nLed a team\f"
+            "Jane Doe - Resume\nExperience\nShipped a product\f"
+            "Jane Doe - Resume\nProjects\nBuilt a tool")
+    result = strip_page_furniture(text, edge_lines=1)
+    assert result.count("Jane Doe - Resume") == 1
+    for line in ("Summary", "Experience", "Projects"):
+        assert line in result
@@ -1,17 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Depends, Body
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Depends, Body, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, FileResponse, ORJSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from functools import partial
 from fastapi.middleware.cors import CORSMiddleware
 import os
-import shutil
-import uuid
 from celery.result import AsyncResult
-from resume_analysis.tasks import full_resume_analysis, celery_app, generate_resume, generate_resume_with_keyword
-from resume_analysis.database import get_resume_analysis, get_db
+from resume_analysis.tasks import (celery_app, start_batch_analysis, start_candidate_ranking, start_resume_analysis,
+                                   start_resume_generation, start_resume_generation_with_keywords)
+from resume_analysis.database import get_resume_analysis, get_db, init_db
+from resume_analysis.settings import (MAX_UPLOAD_SIZE, UPLOAD_DIR, PDF_DIR, BATCH_MAX_JOB_DESCRIPTIONS,
+                                      RANKING_MAX_RESUMES, RANKING_MAX_TOP_K, ADMISSION_ENABLED)
+from resume_analysis.progress import stream_progress, has_progress
+from resume_analysis.serialization import dumps_str
+from resume_analysis.uploads import ingest_upload
+from resume_analysis.idempotency import request_key, submit_once
+from resume_analysis.admission import admit, admission_stats, queue_depths, request_client, task_priority
+from resume_analysis.metrics import QUEUE_DEPTH, latest
+from resume_analysis.upload_store import get_upload_store
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from contextlib import asynccontextmanager
 
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the database schema (and any missing index) before serving requests
+    await run_in_threadpool(init_db)
+    yield
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Set up CORS middleware
 app.add_middleware(
@@ -23,62 +41,204 @@ app.add_middleware(
 )
 
 # Making Upload dir if it does not exist
-UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+UPLOAD_PATHS = ("/upload/", "/generate-resume-with-keyword/", "/batch-analysis/")
+
+# Reject oversized uploads from their Content-Length before the body is read
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        content_length = request.headers.get("content-length")
+        # Allow some room for the multipart envelope and form fields
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE + 1024 * 1024:
+            return JSONResponse(content={"detail": f"File too large. Maximum size is {MAX_UPLOAD_SIZE} bytes."}, status_code=413)
+    return await call_next(request)
+
+SUBMISSION_PATHS = UPLOAD_PATHS + ("/rank-candidates/",)
+
+# Admission control: refuse new work with 429 while the queues are backed up or the
+# client is over its rate limit, before the request body is read
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    if ADMISSION_ENABLED and request.method == "POST" and (
+            request.url.path in SUBMISSION_PATHS or request.url.path.startswith("/generate-resume/")):
+        admission = await admit(request)
+        if not admission.admitted:
+            return JSONResponse(content={"detail": admission.reason}, status_code=429,
+                                headers={"Retry-After": str(admission.retry_after)})
+        request.state.admission = admission
+    return await call_next(request)
+
+async def release_uploads(*paths: str):
+    # A coalesced request queues nothing, so nothing would release its uploads; the
+    # pipeline it was coalesced into holds its own references to the same content
+    for path in paths:
+        await run_in_threadpool(get_upload_store().release, path)
+
 @app.post("/generate-resume-with-keyword/")
-async def upload_files(resume: UploadFile = File(...), missing_keywords: str = Body(...)):
-     # Save the uploaded file with a unique name
-    file_extension = os.path.splitext(resume.filename)[1].lower()
-    unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
+async def upload_files(resume: UploadFile = File(...), missing_keywords: str = Body(...),
+                       idempotency_key: Optional[str] = Header(None),
+                       priority: Optional[int] = Depends(task_priority),
+                       client_id: str = Depends(request_client)):
+    # Stream the upload to disk, validating its size and type from the content
     try:
-        # Save the file to disk
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(resume.file, buffer)
+        upload = await ingest_upload(resume, UPLOAD_DIR)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     finally:
         # Close the file
-        resume.file.close()
+        await resume.close()
     
-    # Queue the Celery task that will handle both file processing and analysis
-    task = generate_resume_with_keyword.delay(file_path, missing_keywords)
+    # Queue the extract -> structure -> render pipeline, unless the same request already was
+    task_id, duplicate = await submit_once(
+        request_key("generate-resume-with-keyword", client_id, idempotency_key, upload.sha256, missing_keywords),
+        partial(start_resume_generation_with_keywords, upload.path, missing_keywords, priority=priority))
+    if duplicate:
+        await release_uploads(upload.path)
 
     return {
-        "task_id": task.id,
-        "status_url": f"/task-status/{task.id}",
+        "task_id": task_id,
+        "deduplicated": duplicate,
+        "status_url": f"/task-status/{task_id}",
+        "events_url": f"/task-events/{task_id}",
         "message": "Analysis task queued successfully"
     }
 
 @app.post("/upload/")
-async def upload_files(resume: UploadFile = File(...), job_description: str = Body(...)):
-    # Save the uploaded file with a unique name
-    file_extension = os.path.splitext(resume.filename)[1].lower()
-    unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
+async def upload_files(resume: UploadFile = File(...), job_description: str = Body(...),
+                       idempotency_key: Optional[str] = Header(None),
+                       priority: Optional[int] = Depends(task_priority),
+                       client_id: str = Depends(request_client)):
+    # Stream the upload to disk, validating its size and type from the content
     try:
-        # Save the file to disk
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(resume.file, buffer)
+        upload = await ingest_upload(resume, UPLOAD_DIR)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     finally:
         # Close the file
-        resume.file.close()
+        await resume.close()
     
-    # Queue the Celery task that will handle both file processing and analysis
-    task = full_resume_analysis.delay(file_path, job_description)
+    # Queue the extract -> analyze pipeline, unless the same request already was
+    task_id, duplicate = await submit_once(
+        request_key("upload", client_id, idempotency_key, upload.sha256, job_description),
+        partial(start_resume_analysis, upload.path, job_description, priority=priority))
+    if duplicate:
+        await release_uploads(upload.path)
     
     # Return the task ID and a URL to check the status
     return {
-        "task_id": task.id,
-        "status_url": f"/task-status/{task.id}",
+        "task_id": task_id,
+        "deduplicated": duplicate,
+        "status_url": f"/task-status/{task_id}",
+        "events_url": f"/task-events/{task_id}",
         "message": "Analysis task queued successfully"
     }
 
+@app.post("/batch-analysis/")
+async def batch_analysis(resume: UploadFile = File(...), job_descriptions: List[str] = Form(...),
+                         idempotency_key: Optional[str] = Header(None),
+                         priority: Optional[int] = Depends(task_priority),
+                         client_id: str = Depends(request_client)):
+    # One resume against many job descriptions: the resume is extracted once and the
+    # analyses run concurrently; the result lists every posting ranked by current_score
+    job_descriptions = [jd for jd in job_descriptions if jd.strip()]
+    if not job_descriptions:
+        raise HTTPException(status_code=400, detail="At least one job description is required.")
+    if len(job_descriptions) > BATCH_MAX_JOB_DESCRIPTIONS:
+        raise HTTPException(status_code=400,
+                            detail=f"Too many job descriptions. Maximum is {BATCH_MAX_JOB_DESCRIPTIONS}.")
+
+    # Stream the upload to disk, validating its size and type from the content
+    try:
+        upload = await ingest_upload(resume, UPLOAD_DIR)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
+    finally:
+        await resume.close()
+
+    task_id, duplicate = await submit_once(
+        request_key("batch-analysis", client_id, idempotency_key, upload.sha256, *job_descriptions),
+        partial(start_batch_analysis, upload.path, job_descriptions, priority=priority))
+    if duplicate:
+        await release_uploads(upload.path)
+
+    return {
+        "task_id": task_id,
+        "deduplicated": duplicate,
+        "status_url": f"/task-status/{task_id}",
+        "events_url": f"/task-events/{task_id}",
+        "job_descriptions": len(job_descriptions),
+        "message": "Batch analysis queued successfully"
+    }
+
+@app.post("/rank-candidates/")
+async def rank_candidates(resumes: List[UploadFile] = File(...), job_description: str = Body(...),
+                          top_k: int = Form(0), idempotency_key: Optional[str] = Header(None),
+                          priority: Optional[int] = Depends(task_priority),
+                          client_id: str = Depends(request_client)):
+    # Many resumes against one job description: every resume is scored locally in one
+    # vectorized pass, only the top_k best are escalated to the LLM analysis
+    if len(resumes) > RANKING_MAX_RESUMES:
+        raise HTTPException(status_code=400, detail=f"Too many resumes. Maximum is {RANKING_MAX_RESUMES}.")
+    if not 0 <= top_k <= RANKING_MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 0 and {RANKING_MAX_TOP_K}.")
+
+    uploads = []
+    hashes = []
+    try:
+        for resume in resumes:
+            upload = await ingest_upload(resume, UPLOAD_DIR)
+            uploads.append((upload.path, resume.filename or os.path.basename(upload.path)))
+            hashes.append(upload.sha256)
+    except Exception as e:
+        # Drop the references already taken, nothing was queued
+        await release_uploads(*(path for path, _ in uploads))
+        if isinstance(e, HTTPException):
+            raise HTTPException(status_code=e.status_code, detail=f"{resume.filename}: {e.detail}")
+        raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
+    finally:
+        for resume in resumes:
+            await resume.close()
+
+    task_id, duplicate = await submit_once(
+        request_key("rank-candidates", client_id, idempotency_key, job_description, top_k,
+                    *(f"{sha256}:{filename}" for sha256, (_, filename) in zip(hashes, uploads))),
+        partial(start_candidate_ranking, uploads, job_description, top_k, priority=priority))
+    if duplicate:
+        await release_uploads(*(path for path, _ in uploads))
+
+    return {
+        "task_id": task_id,
+        "deduplicated": duplicate,
+        "status_url": f"/task-status/{task_id}",
+        "events_url": f"/task-events/{task_id}",
+        "resumes": len(uploads),
+        "message": "Candidate ranking queued successfully"
+    }
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    # Queue depth per pipeline queue and admission counters, shared by all API processes
+    return await admission_stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus scrape endpoint. Queue depths are read from the broker on every scrape.
+    try:
+        for queue, depth in (await queue_depths()).items():
+            QUEUE_DEPTH.labels(queue).set(depth)
+    except Exception as e:
+        print(f"Warning: could not read queue depths: {str(e)}")
+    content, content_type = await run_in_threadpool(latest)
+    return Response(content=content, media_type=content_type)
+
 @app.get("/task-status/{task_id}")
 async def get_task_status(task_id: str):
     task_result = AsyncResult(task_id, app=celery_app)
@@ -94,10 +254,66 @@ async def get_task_status(task_id: str):
     elif task_result.status == "FAILURE":
         response["error"] = str(task_result.result)
     
-    return response
+    # Returned as a response, so the result is encoded once by orjson instead of
+    # first walked by FastAPI's jsonable_encoder on every poll
+    return ORJSONResponse(response)
+
+async def task_events(task_id: str):
+    # Progress events of a task, ending with its result. Tasks that finished before
+    # their events were recorded (or whose events expired) get a single final event.
+    if not await has_progress(task_id):
+        task_result = AsyncResult(task_id, app=celery_app)
+        status = await run_in_threadpool(lambda: task_result.status)
+        if status == "SUCCESS":
+            yield {"task_id": task_id, "stage": "completed", "result": await run_in_threadpool(lambda: task_result.result)}
+            return
+        if status == "FAILURE":
+            yield {"task_id": task_id, "stage": "failed", "error": await run_in_threadpool(lambda: str(task_result.result))}
+            return
+    async for event in stream_progress(task_id):
+        yield event
+
+def sse_event(event: dict) -> str:
+    return f"event: {event['stage']}\ndata: {dumps_str(event)}\n\n"
+
+def task_event_stream(task_id: str, *first_events) -> StreamingResponse:
+    # Server-Sent Events response for the events of a task
+    async def event_stream():
+        for event in first_events:
+            yield sse_event(event)
+        async for event in task_events(task_id):
+            if event is None:
+                # Heartbeat comment keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+            else:
+                yield sse_event(event)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/task-events/{task_id}")
+async def stream_task_events(task_id: str):
+    # Server-Sent Events stream of stage transitions (extracted, analyzed, structured,
+    # rendered) and the final result, instead of polling /task-status
+    return task_event_stream(task_id)
+
+@app.websocket("/ws/task-status/{task_id}")
+async def task_status_websocket(websocket: WebSocket, task_id: str):
+    # WebSocket variant of /task-events, one JSON message per event
+    await websocket.accept()
+    try:
+        async for event in task_events(task_id):
+            if event is not None:
+                await websocket.send_text(dumps_str(event))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
 
 @app.post("/generate-resume/{task_id}")
-async def generate_structured_resume(task_id: str,  db: AsyncSession = Depends(get_db)):
+async def generate_structured_resume(task_id: str,  db: AsyncSession = Depends(get_db),
+                                     idempotency_key: Optional[str] = Header(None),
+                                     priority: Optional[int] = Depends(task_priority),
+                                     client_id: str = Depends(request_client)):
     # Get the saved analysis data from the database
     analysis_data = await get_resume_analysis(task_id, db)
     
@@ -107,17 +323,46 @@ async def generate_structured_resume(task_id: str,  db: AsyncSession = Depends(g
     # Convert the stored analysis results from JSON string to dict
     analysis_dict = analysis_data.to_dict()
     
-    # from resume_analysis.langchain_test import ResumeAnalyzer
-    task = generate_resume.delay(analysis_dict)
+    # Queue the structure -> render pipeline, once per analysis while it is in flight
+    pipeline_id, duplicate = await submit_once(request_key("generate-resume", client_id, idempotency_key, task_id),
+                                               partial(start_resume_generation, analysis_dict, priority=priority))
 
     return {
-        "task_id": task.id,
-        "status_url": f"/task-status/{task.id}"
+        "task_id": pipeline_id,
+        "deduplicated": duplicate,
+        "status_url": f"/task-status/{pipeline_id}",
+        "events_url": f"/task-events/{pipeline_id}"
     }
 
+@app.post("/generate-resume/{task_id}/stream")
+async def stream_structured_resume(task_id: str, db: AsyncSession = Depends(get_db),
+                                   idempotency_key: Optional[str] = Header(None),
+                                   priority: Optional[int] = Depends(task_priority),
+                                   client_id: str = Depends(request_client)):
+    # Same as /generate-resume/{task_id}, but the response is the task's event stream:
+    # every resume section arrives as a "section" event as soon as the model has
+    # written it, followed by the rendered PDF in the "completed" event
+    analysis_data = await get_resume_analysis(task_id, db)
+
+    if not analysis_data:
+        raise HTTPException(status_code=404, detail="Analysis data not found. Please run analysis first.")
+
+    # A duplicate replays the events of the pipeline already running
+    pipeline_id, duplicate = await submit_once(
+        request_key("generate-resume-stream", client_id, idempotency_key, task_id),
+        partial(start_resume_generation, analysis_data.to_dict(), stream_sections=True,
+                priority=priority))
+
+    return task_event_stream(pipeline_id, {
+        "task_id": pipeline_id,
+        "deduplicated": duplicate,
+        "stage": "queued",
+        "status_url": f"/task-status/{pipeline_id}",
+        "events_url": f"/task-events/{pipeline_id}"
+    })
+
 @app.get("/resume/download/{filename}")
 async def download_pdf(filename: str):
-    PDF_DIR="generated_pdfs"
     file_path = os.path.join(PDF_DIR, filename)
     if os.path.exists(file_path):
         # Check if file is not empty